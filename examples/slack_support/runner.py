@@ -14,17 +14,35 @@ Quickstart:
 from __future__ import annotations
 
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict
 
 from fastapi import FastAPI, Header, HTTPException
 from pydantic import BaseModel
 
-from apl import Runtime, parse_apl
+from apl import BatchingLLM, MockLLM, Runtime
+from apl.parser import load_or_parse
+from apl.runtime import RuntimePool, prepare_program
 
 
 PROGRAM_PATH = Path(__file__).with_name("slack_support.apl")
-PROGRAM = parse_apl(PROGRAM_PATH.read_text(encoding="utf-8"))
+PROGRAM = load_or_parse(PROGRAM_PATH)
+prepare_program(PROGRAM)
+
+
+_ENV_RE = re.compile(r"^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t]*$", re.MULTILINE)
+
+
+@lru_cache(maxsize=8)
+def _read_env(path_str: str, mtime: float) -> Dict[str, str]:
+    """Parse KEY=VALUE pairs from an .env file; cached per (path, mtime)."""
+    values: Dict[str, str] = {}
+    # comment lines never match: '#' cannot start a key
+    for key, value in _ENV_RE.findall(Path(path_str).read_text(encoding="utf-8")):
+        values.setdefault(key, value)
+    return values
 
 
 def _load_env_files() -> None:
@@ -34,24 +52,46 @@ def _load_env_files() -> None:
         Path(__file__).resolve().parents[1] / ".env",
     ]
     for env_path in candidates:
-        if not env_path.exists():
+        try:
+            mtime = env_path.stat().st_mtime
+        except OSError:
             continue
-        for line in env_path.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            if not line or line.startswith("#") or "=" not in line:
-                continue
-            key, value = line.split("=", 1)
-            os.environ.setdefault(key.strip(), value.strip())
+        for key, value in _read_env(str(env_path), mtime).items():
+            os.environ.setdefault(key, value)
 
 
 _load_env_files()
 API_TOKEN = os.getenv("SLACK_SUPPORT_API_TOKEN")
 
+# One LLM is shared by every request. With SLACK_SUPPORT_BATCH_LLM=1, call_llm
+# prompts from tickets handled concurrently within a 25 ms window are coalesced
+# into a single LiteLLM batch request (at most 16 prompts per batch).
+if os.getenv("SLACK_SUPPORT_BATCH_LLM", "").lower() in {"1", "true", "yes"}:
+    LLM: Any = BatchingLLM(flush_interval_ms=25, max_batch=16)
+else:
+    LLM = MockLLM()
+
+# Runtimes are recycled across requests; each reset drops its memoized LLM replies.
+RUNTIME_POOL = RuntimePool(lambda: Runtime(llm=LLM))
+
 try:
     SLACK_SUPPORT_TASK = next(t for t in PROGRAM.tasks if t.name == "slack_support.triage")
 except StopIteration as exc:  # pragma: no cover - configuration error
     raise RuntimeError("slack_support.triage task not found in slack_support.apl") from exc
 
+# Split the task at its `return` step once: the steps before it are executed
+# per request and the return expression is evaluated afterwards.
+RETURN_STEP_IDX = next(
+    (i for i, s in enumerate(SLACK_SUPPORT_TASK.steps) if s.raw.lstrip().lower().startswith("return ")),
+    None,
+)
+BODY_STEPS = SLACK_SUPPORT_TASK.steps[:RETURN_STEP_IDX]
+RETURN_EXPR = (
+    SLACK_SUPPORT_TASK.steps[RETURN_STEP_IDX].raw.strip()[len("return ") :].strip()
+    if RETURN_STEP_IDX is not None
+    else None
+)
+
 
 class TicketPayload(BaseModel):
     ticket: str
@@ -60,37 +100,35 @@ class TicketPayload(BaseModel):
 app = FastAPI(title="APL Slack Support Runner")
 
 
-def _run_triage(ticket: str) -> Dict[str, Any]:
-    runtime = Runtime()
-    runtime.vars["ticket"] = ticket
-    response_payload: Dict[str, Any] | None = None
-
-    for step in SLACK_SUPPORT_TASK.steps:
-        result = runtime.execute_step(step)
-        if step.assignment:
-            runtime.vars[step.assignment] = result
+async def _run_triage(ticket: str) -> Dict[str, Any]:
+    with RUNTIME_POOL.lease() as runtime:
+        runtime.vars["ticket"] = ticket
+        response_payload: Dict[str, Any] | None = None
 
-        raw = step.raw.strip()
-        if raw.lower().startswith("return "):
-            expr = raw[len("return ") :].strip()
-            response_payload = runtime._eval_expr(expr)  # type: ignore[attr-defined]
-            break
+        # independent steps (e.g. the two call_llm drafts) run concurrently
+        await runtime.execute_steps_async(BODY_STEPS)
+        if RETURN_EXPR is not None:
+            response_payload = runtime._eval_expr(RETURN_EXPR)  # type: ignore[attr-defined]
 
-    if response_payload is None:
-        response_payload = dict(runtime.vars)
+        # returning the runtime to the pool rebinds its vars, so this run's
+        # dict can be handed to the response as-is; FastAPI serializes it at
+        # the JSON boundary
+        variables = runtime.vars
+        if response_payload is None:
+            response_payload = variables
 
     return {
         "result": response_payload,
-        "variables": dict(runtime.vars),
+        "variables": variables,
     }
 
 
 @app.post("/agents/slack-support")
-def triage(payload: TicketPayload, authorization: str | None = Header(default=None)) -> Dict[str, Any]:
+async def triage(payload: TicketPayload, authorization: str | None = Header(default=None)) -> Dict[str, Any]:
     if not payload.ticket:
         raise HTTPException(status_code=400, detail="ticket text is required")
     if API_TOKEN:
         expected = f"Bearer {API_TOKEN}"
         if authorization != expected:
             raise HTTPException(status_code=401, detail="invalid or missing token")
-    return _run_triage(payload.ticket)
+    return await _run_triage(payload.ticket)
@@ -1,21 +1,64 @@
-"""Public API surface for the Agent Programming Language package."""
+"""Public API surface for the Agent Programming Language package.
+
+The AST and parser are imported eagerly; the runtime (thread pools),
+compiler, IR, n8n, authoring and pipeline helpers (which pull in
+pydantic/LiteLLM) load on first attribute access, so `apl --help` and other
+light CLI paths do not import them.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
 from .ast import Program, Task, Step
-from .parser import parse_apl
-from .runtime import Runtime, MockLLM
-from .compiler import compile_to_python_module, write_compiled_artifacts
-from .ir import to_langgraph_ir
-from .n8n import N8NClient, to_n8n_workflow
-from .authoring import LiteLLMAuthor, AuthoringConfig
-from .pipeline import run_pipeline, PipelineArtifacts
+from .parser import parse_apl, parse_apl_file
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .runtime import Runtime, MockLLM
+    from .llm_batch import BatchingLLM
+    from .compiler import compile_to_python_module, write_compiled_artifacts
+    from .ir import to_langgraph_ir
+    from .n8n import N8NClient, to_n8n_workflow
+    from .authoring import LiteLLMAuthor, AuthoringConfig
+    from .pipeline import run_pipeline, PipelineArtifacts
+
+_LAZY_EXPORTS = {
+    "Runtime": ".runtime",
+    "MockLLM": ".runtime",
+    "BatchingLLM": ".llm_batch",
+    "compile_to_python_module": ".compiler",
+    "write_compiled_artifacts": ".compiler",
+    "to_langgraph_ir": ".ir",
+    "N8NClient": ".n8n",
+    "to_n8n_workflow": ".n8n",
+    "LiteLLMAuthor": ".authoring",
+    "AuthoringConfig": ".authoring",
+    "run_pipeline": ".pipeline",
+    "PipelineArtifacts": ".pipeline",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
 
 __all__ = [
     "Program",
     "Task",
     "Step",
     "parse_apl",
+    "parse_apl_file",
     "Runtime",
     "MockLLM",
+    "BatchingLLM",
     "compile_to_python_module",
     "write_compiled_artifacts",
     "to_langgraph_ir",
@@ -0,0 +1,82 @@
+"""JSON encoding helpers shared by the CLI and artifact writers."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, BinaryIO, Callable, Optional
+
+try:  # pragma: no cover - import guarded for optional dependency
+    import orjson
+except Exception:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+
+def dumps(
+    obj: Any, indent: bool = True, default: Optional[Callable[[Any], Any]] = None
+) -> bytes:
+    """Serialize `obj` as UTF-8 JSON bytes, 2-space indented unless `indent` is False.
+
+    Uses orjson when it is installed and falls back to the stdlib encoder, also
+    for values orjson rejects (e.g. integers wider than 64 bits). `default`
+    converts unsupported objects, dataclasses included.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        if default is not None:
+            option |= orjson.OPT_PASSTHROUGH_DATACLASS
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            pass
+    # without indentation, match orjson's compact separators byte for byte
+    return json.dumps(
+        obj,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        ensure_ascii=False,
+        default=default,
+    ).encode("utf-8")
+
+
+def dumps_canonical(obj: Any) -> bytes:
+    """Serialize `obj` as compact, key-sorted UTF-8 JSON for hashing.
+
+    orjson and the stdlib fallback emit the same bytes for str/int/list/dict/None
+    documents such as the IR.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(
+        obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def dump(obj: Any, fp: BinaryIO) -> None:
+    """Write `obj` to a binary file as indented JSON.
+
+    orjson encodes in one shot; the stdlib fallback streams chunks from
+    `iterencode` so the full document is never held as one string.
+    """
+    if orjson is not None:
+        try:
+            fp.write(
+                orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            )
+            return
+        except TypeError:
+            pass
+    for chunk in json.JSONEncoder(indent=2, ensure_ascii=False).iterencode(obj):
+        fp.write(chunk.encode("utf-8"))
+
+
+def loads(data: bytes) -> Any:
+    """Deserialize JSON from bytes, preferring orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+__all__ = ["dump", "dumps", "dumps_canonical", "loads"]
@@ -6,7 +6,7 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Any
 
 
-@dataclass
+@dataclass(slots=True)
 class Step:
     """A single executable step within a task."""
 
@@ -15,9 +15,11 @@ class Step:
     action: Optional[str] = None
     args: Optional[str] = None
     requires: List[str] = field(default_factory=list)
+    # execution plan attached by apl.runtime.compile_step; derived, never serialized
+    compiled: Optional[Any] = field(default=None, repr=False, compare=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """A named task (often an agent function) containing ordered steps."""
 
@@ -29,7 +31,7 @@ class Task:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class Program:
     """Top-level program containing metadata and tasks."""
 
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
 import os
 
 from .env import load_env_defaults
@@ -40,14 +40,36 @@ class LiteLLMAuthor:
 
     def generate_program(self, prompt: str) -> str:
         """Generate an APL program for the supplied natural language prompt."""
-        if self.config.mock or os.getenv("APL_LLM_MOCK", "").lower() in {"1", "true", "yes"}:
+        if self._use_mock():
             return self._mock_program(prompt)
 
+        response = self._litellm().completion(**self._completion_kwargs(prompt))
+        return self._extract_content(response)
+
+    async def generate_program_async(self, prompt: str) -> str:
+        """Async variant of `generate_program` backed by `litellm.acompletion`.
+
+        Lets callers author several programs concurrently on one event loop while
+        LiteLLM reuses its pooled HTTP client across requests.
+        """
+        if self._use_mock():
+            return self._mock_program(prompt)
+
+        response = await self._litellm().acompletion(**self._completion_kwargs(prompt))
+        return self._extract_content(response)
+
+    def _use_mock(self) -> bool:
+        return self.config.mock or os.getenv("APL_LLM_MOCK", "").lower() in {"1", "true", "yes"}
+
+    @staticmethod
+    def _litellm():
         if litellm is None:
             raise RuntimeError(
                 "LiteLLM is not installed. Install with `pip install litellm` or enable mock mode."
             )
+        return litellm
 
+    def _completion_kwargs(self, prompt: str) -> Dict[str, Any]:
         model = (
             self.config.model
             or os.getenv("APL_LLM_MODEL")
@@ -55,15 +77,17 @@ class LiteLLMAuthor:
             or "gpt-4o-mini"
         )
         temperature = float(os.getenv("APL_LLM_TEMPERATURE", self.config.temperature))
-
-        response = litellm.completion(
-            model=model,
-            messages=[
+        return {
+            "model": model,
+            "messages": [
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
             ],
-            temperature=temperature,
-        )
+            "temperature": temperature,
+        }
+
+    @staticmethod
+    def _extract_content(response: Any) -> str:
         try:
             content = response["choices"][0]["message"]["content"]
         except Exception as exc:  # pragma: no cover - defensive
@@ -2,45 +2,81 @@
 
 from __future__ import annotations
 
-import argparse
-import json
+import sys
 from pathlib import Path
-from typing import Sequence
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Tuple
 
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import argparse
+
+from ._json import dumps
+from .ast import Program, Step, Task
 from .env import load_env_defaults
 from .parser import parse_apl
-from .runtime import Runtime
-from .compiler import write_compiled_artifacts
-from .n8n import to_n8n_workflow
-from .ir import _validate_ir, to_langgraph_ir
-from .authoring import LiteLLMAuthor, AuthoringConfig
-from .pipeline import run_pipeline
+
+# Runtime, compiler, IR (pydantic), n8n, authoring and pipeline modules are
+# imported inside the command handlers that use them so `apl --help` and
+# argument errors do not pay for them.
+
+
+def _validate_ir(payload) -> None:
+    from .ir import _validate_ir as validate
+
+    validate(payload)
+
+
+def _print_json(obj, default=None) -> None:
+    """Write `obj` to stdout as indented JSON, bypassing the text layer when possible."""
+    payload = dumps(obj, default=default)
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        print(payload.decode("utf-8"))
+        return
+    # keep ordering with anything already printed through the text layer
+    sys.stdout.flush()
+    buffer.write(payload + b"\n")
+    buffer.flush()
+
+
+# parsed programs keyed by (resolved path, mtime_ns, size)
+_PROGRAM_CACHE: Dict[Tuple[str, int, int], Program] = {}
 
 
 def _load_program(path: Path):
-    text = path.read_text(encoding="utf-8")
-    return parse_apl(text)
+    resolved = path.resolve()
+    stat = resolved.stat()
+    key = (str(resolved), stat.st_mtime_ns, stat.st_size)
+    program = _PROGRAM_CACHE.get(key)
+    if program is None:
+        program = parse_apl(resolved.read_bytes().decode("utf-8"))
+        _PROGRAM_CACHE[key] = program
+    return program
+
+
+def _summary_default(obj):
+    # tasks and steps are encoded straight from the parsed program
+    if isinstance(obj, Step):
+        return obj.raw
+    if isinstance(obj, Task):
+        return {"name": obj.name, "args": obj.args, "steps": obj.steps}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
 def _cmd_validate(path: Path) -> None:
     program = _load_program(path)
-    summary = {
-        "program": program.name,
-        "meta": program.meta,
-        "tasks": [
-            {
-                "name": task.name,
-                "args": task.args,
-                "steps": [step.raw for step in task.steps],
-            }
-            for task in program.tasks
-        ],
-    }
-    print(json.dumps(summary, indent=2))
+    summary = {"program": program.name, "meta": program.meta, "tasks": program.tasks}
+    _print_json(summary, default=_summary_default)
 
 
-def _cmd_translate(path: Path, strict: bool = False) -> None:
+def _cmd_translate(path: Path, strict: bool = False, soa: bool = False) -> None:
+    from .ir import to_langgraph_ir, to_langgraph_ir_soa
+
     program = _load_program(path)
+    if soa:
+        # the pydantic schema describes the node-list layout only
+        _print_json(to_langgraph_ir_soa(program))
+        return
     payload = to_langgraph_ir(program)
     # validate IR before emitting to surface schema issues early
     try:
@@ -50,21 +86,25 @@ def _cmd_translate(path: Path, strict: bool = False) -> None:
             raise SystemExit(f"IR validation failed: {e}")
         else:
             print(f"IR validation warning: {e}")
-    print(json.dumps(payload, indent=2))
+    _print_json(payload)
+
+
+_NO_CAPS: frozenset = frozenset()
 
 
 def _cmd_run(path: Path, allow_storage: bool, strict: bool = False) -> None:
+    from .runtime import Runtime
+
     program = _load_program(path)
 
     # CLI preflight: ensure declared capabilities match step requirements.
     agents_meta = program.meta.get("agents", {})
+    cap_sets = {agent: frozenset(meta.get("capabilities", [])) for agent, meta in agents_meta.items()}
     missing = []
     for task in program.tasks:
         # task names are typically "agent.fn"; fall back safely
-        agent_name = task.name.split(".", 1)[0] if "." in task.name else None
-        declared_caps = []
-        if agent_name and agent_name in agents_meta:
-            declared_caps = agents_meta[agent_name].get("capabilities", [])
+        agent_name, dot, _ = task.name.partition(".")
+        declared_caps = cap_sets.get(agent_name, _NO_CAPS) if dot else _NO_CAPS
         for step in task.steps:
             for req in step.requires:
                 # allow runtime override for storage capability via --allow-storage
@@ -82,14 +122,18 @@ def _cmd_run(path: Path, allow_storage: bool, strict: bool = False) -> None:
 
     runtime = Runtime(allow_storage=allow_storage)
     result = runtime.execute_program(program)
-    print(json.dumps(result, indent=2))
+    _print_json(result)
 
 
 def _cmd_compile(path: Path, python_out: Path | None, ir_out: Path | None, strict: bool = False) -> None:
+    from .compiler import write_compiled_artifacts
+    from .ir import to_langgraph_ir
+
     program = _load_program(path)
     if not python_out and not ir_out:
         raise SystemExit("compile requires at least one of --python-out or --ir-out")
     # validate IR early to provide clearer compile-time diagnostics
+    payload = None
     if ir_out:
         payload = to_langgraph_ir(program)
         try:
@@ -99,20 +143,23 @@ def _cmd_compile(path: Path, python_out: Path | None, ir_out: Path | None, stric
                 raise SystemExit(f"IR validation failed during compile: {e}")
             else:
                 print(f"IR validation warning during compile: {e}")
-    write_compiled_artifacts(program, python_out=python_out, ir_path=ir_out)
+    write_compiled_artifacts(program, python_out=python_out, ir_path=ir_out, ir_payload=payload)
 
 
 def _cmd_export_n8n(path: Path, runtime_url: str | None, out: Path | None) -> None:
+    from .n8n import to_n8n_workflow
+
     program = _load_program(path)
     workflow = to_n8n_workflow(program, runtime_url=runtime_url)
-    payload = json.dumps(workflow, indent=2)
     if out:
-        out.write_text(payload, encoding="utf-8")
+        out.write_bytes(dumps(workflow))
     else:
-        print(payload)
+        _print_json(workflow)
 
 
 def _cmd_author(prompt_path: Path, out_path: Path, model: str | None, mock: bool) -> None:
+    from .authoring import LiteLLMAuthor, AuthoringConfig
+
     config = AuthoringConfig(model=model, mock=mock)
     author = LiteLLMAuthor(config)
     prompt = prompt_path.read_text(encoding="utf-8")
@@ -130,6 +177,9 @@ def _cmd_demo(
     mock_llm: bool,
     allow_storage: bool,
 ) -> None:
+    from .authoring import AuthoringConfig
+    from .pipeline import run_pipeline
+
     config = AuthoringConfig(model=model, mock=mock_llm)
     prompt = prompt_path.read_text(encoding="utf-8")
     artifacts = run_pipeline(
@@ -148,7 +198,16 @@ def _cmd_demo(
         "run": str(artifacts.run_path),
         "outputs": artifacts.outputs,
     }
-    print(json.dumps(summary, indent=2))
+    _print_json(summary)
+
+_REPL_COMMANDS = ("run", "help", "exit", "quit")
+_REPL_HISTORY = Path.home() / ".apl_history"
+
+
+def _repl_completer(text: str, state: int) -> Optional[str]:
+    matches = [command for command in _REPL_COMMANDS if command.startswith(text)]
+    return matches[state] if state < len(matches) else None
+
 
 def _cmd_repl(path: Path | None) -> None:
     """
@@ -162,6 +221,8 @@ def _cmd_repl(path: Path | None) -> None:
       exit, quit     - exit REPL
       help           - show this help
     """
+    from .runtime import Runtime
+
     program = None
     if path:
         try:
@@ -171,97 +232,246 @@ def _cmd_repl(path: Path | None) -> None:
             print(f"Failed to load program: {e}")
             program = None
 
+    # one runtime serves every `run`; its per-run state is rolled back after
+    # each execution so runs stay independent while caches are kept
     runtime = Runtime()
 
-    print("APL REPL - type 'help' for commands, 'exit' to quit.")
-    while True:
+    def _run() -> bool:
+        if program is None:
+            print("No program loaded. Provide a file path to 'apl repl <file>' to load a program.")
+            return False
+        state = runtime.snapshot()
         try:
-            line = input("apl> ").strip()
-        except EOFError:
-            print()
-            break
-        except KeyboardInterrupt:
-            print()
-            break
-
-        if not line:
-            continue
-        if line in ("exit", "quit"):
-            break
-        if line == "help":
-            print("Commands: run, help, exit")
-            continue
-
-        if line == "run":
-            if program is None:
-                print("No program loaded. Provide a file path to 'apl repl <file>' to load a program.")
+            result = runtime.execute_program(program)
+            _print_json(result)
+        except Exception as e:
+            print(f"Execution error: {e}")
+        finally:
+            runtime.restore(state)
+        return False
+
+    def _help() -> bool:
+        print("Commands: run, help, exit")
+        return False
+
+    def _exit() -> bool:
+        return True
+
+    def _unknown() -> bool:
+        print("Unknown command. Type 'help' for assistance.")
+        return False
+
+    commands = {"run": _run, "help": _help, "exit": _exit, "quit": _exit}
+
+    try:
+        import readline
+    except ImportError:  # pragma: no cover - platforms without GNU readline
+        readline = None  # type: ignore[assignment]
+    if readline is not None:
+        try:
+            readline.read_history_file(_REPL_HISTORY)
+        except OSError:
+            pass
+        readline.set_completer(_repl_completer)
+        readline.parse_and_bind("tab: complete")
+
+    print("APL REPL - type 'help' for commands, 'exit' to quit.")
+    try:
+        while True:
+            try:
+                line = input("apl> ").strip()
+            except EOFError:
+                print()
+                break
+            except KeyboardInterrupt:
+                print()
+                break
+
+            if not line:
                 continue
+            if commands.get(line, _unknown)():
+                break
+    finally:
+        if readline is not None:
             try:
-                result = runtime.execute_program(program)
-                print(json.dumps(result, indent=2))
-            except Exception as e:
-                print(f"Execution error: {e}")
-            continue
+                readline.write_history_file(_REPL_HISTORY)
+            except OSError:
+                pass
+
+
+_REQUIRED = object()
+
+_PROMPT_ARG = ("prompt", "Path to the natural language prompt file")
+
+# Single source of truth for the command surface, used both to build the
+# argparse parser and by the argparse-free fast path:
+# command -> (help, positionals, {option: (dest, type or None for flags, default, help)}).
+# Positionals are (name, help) pairs; a trailing "?" marks an optional one.
+_COMMANDS: Dict[str, Tuple[str, Tuple[Tuple[str, Optional[str]], ...], Dict[str, Tuple[str, Any, Any, str]]]] = {
+    "validate": ("Parse and display a summary of the program", (("file", None),), {}),
+    "translate": (
+        "Emit LangGraph-like IR",
+        (("file", None),),
+        {
+            "--strict": ("strict", None, False, "Fail on IR validation warnings"),
+            "--soa": ("soa", None, False, "Emit node fields as parallel columns instead of a node list"),
+        },
+    ),
+    "run": (
+        "Execute the program with the reference runtime",
+        (("file", None),),
+        {
+            "--allow-storage": ("allow_storage", None, False, "Enable storage capability during execution"),
+            "--strict": ("strict", None, False, "Treat preflight warnings as errors"),
+        },
+    ),
+    "compile": (
+        "Compile program to artifacts (Python module / IR)",
+        (("file", None),),
+        {
+            "--python-out": ("python_out", Path, None, "Path to write compiled Python module"),
+            "--ir-out": ("ir_out", Path, None, "Path to write IR JSON"),
+            "--strict": ("strict", None, False, "Fail the compile if IR validation reports problems"),
+        },
+    ),
+    "repl": (
+        "Start a minimal interactive REPL optionally loading a program",
+        (("file?", "Optional APL file to load"),),
+        {},
+    ),
+    "export-n8n": (
+        "Generate an n8n workflow JSON from annotated tasks",
+        (("file", None),),
+        {
+            "--runtime-url": ("runtime_url", str, None, "Override the runtime URL used inside the generated workflow"),
+            "--out": ("out", Path, None, "Path to write the workflow JSON (stdout if omitted)"),
+        },
+    ),
+    "author": (
+        "Generate an APL program using LiteLLM",
+        (_PROMPT_ARG,),
+        {
+            "--out": ("out", Path, _REQUIRED, "Output path for the generated APL file"),
+            "--model": ("model", str, None, "Override the LiteLLM model to use"),
+            "--mock": ("mock", None, False, "Use deterministic mock authoring output"),
+        },
+    ),
+    "demo": (
+        "Run the 4-step author -> compile -> adapt -> validate pipeline",
+        (_PROMPT_ARG,),
+        {
+            "--out-dir": ("out_dir", Path, Path("demo"), "Directory to write pipeline artifacts"),
+            "--name": ("name", str, "demo_program", "Base name for generated artifacts"),
+            "--model": ("model", str, None, "Override the LiteLLM model to use"),
+            "--mock-llm": ("mock_llm", None, False, "Use deterministic mock authoring output"),
+            "--allow-storage": ("allow_storage", None, False, "Enable storage capability during runtime execution"),
+        },
+    ),
+}
+
+# commands whose execution reads configuration from the environment (.env
+# defaults), including APL_SKIP_IR_VALIDATION for the IR-validating ones; the
+# others only parse and transform the program
+_ENV_COMMANDS = frozenset({"translate", "compile", "run", "repl", "author", "demo"})
+
+
+def _add_command_args(p: argparse.ArgumentParser, command: str) -> None:
+    _, positionals, options = _COMMANDS[command]
+    for name, help_text in positionals:
+        kwargs: Dict[str, Any] = {"type": Path}
+        if name.endswith("?"):
+            kwargs["nargs"] = "?"
+        if help_text:
+            kwargs["help"] = help_text
+        p.add_argument(name.rstrip("?"), **kwargs)
+    for flag, (_, kind, default, help_text) in options.items():
+        if kind is None:
+            p.add_argument(flag, action="store_true", help=help_text)
+        elif default is _REQUIRED:
+            p.add_argument(flag, type=kind, required=True, help=help_text)
+        else:
+            p.add_argument(flag, type=kind, default=default, help=help_text)
 
-        print("Unknown command. Type 'help' for assistance.")
 
+def build_parser(argv: Sequence[str] | None = None) -> argparse.ArgumentParser:
+    """Build the CLI parser.
+
+    When `argv` names a command, only that subparser gets its arguments; the
+    others are registered by name so help and error output still list them.
+    """
+    import argparse
 
-def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="apl", description="Agent Programming Language CLI")
     sub = parser.add_subparsers(dest="command")
 
-    p_val = sub.add_parser("validate", help="Parse and display a summary of the program")
-    p_val.add_argument("file", type=Path)
-
-    p_trans = sub.add_parser("translate", help="Emit LangGraph-like IR")
-    p_trans.add_argument("file", type=Path)
-    p_trans.add_argument("--strict", action="store_true", help="Fail on IR validation warnings")
-
-    p_run = sub.add_parser("run", help="Execute the program with the reference runtime")
-    p_run.add_argument("file", type=Path)
-    p_run.add_argument("--allow-storage", action="store_true", help="Enable storage capability during execution")
-    p_run.add_argument("--strict", action="store_true", help="Treat preflight warnings as errors")
-
-    p_comp = sub.add_parser("compile", help="Compile program to artifacts (Python module / IR)")
-    p_comp.add_argument("file", type=Path)
-    p_comp.add_argument("--python-out", type=Path, help="Path to write compiled Python module")
-    p_comp.add_argument("--ir-out", type=Path, help="Path to write IR JSON")
-    p_comp.add_argument("--strict", action="store_true", help="Fail the compile if IR validation reports problems")
-
-    p_repl = sub.add_parser("repl", help="Start a minimal interactive REPL optionally loading a program")
-    p_repl.add_argument("file", type=Path, nargs="?", help="Optional APL file to load")
-
-    p_n8n = sub.add_parser("export-n8n", help="Generate an n8n workflow JSON from annotated tasks")
-    p_n8n.add_argument("file", type=Path)
-    p_n8n.add_argument("--runtime-url", type=str, help="Override the runtime URL used inside the generated workflow")
-    p_n8n.add_argument("--out", type=Path, help="Path to write the workflow JSON (stdout if omitted)")
-
-    p_author = sub.add_parser("author", help="Generate an APL program using LiteLLM")
-    p_author.add_argument("prompt", type=Path, help="Path to the natural language prompt file")
-    p_author.add_argument("--out", type=Path, required=True, help="Output path for the generated APL file")
-    p_author.add_argument("--model", type=str, help="Override the LiteLLM model to use")
-    p_author.add_argument("--mock", action="store_true", help="Use deterministic mock authoring output")
-
-    p_demo = sub.add_parser("demo", help="Run the 4-step author -> compile -> adapt -> validate pipeline")
-    p_demo.add_argument("prompt", type=Path, help="Path to the natural language prompt file")
-    p_demo.add_argument("--out-dir", type=Path, default=Path("demo"), help="Directory to write pipeline artifacts")
-    p_demo.add_argument("--name", type=str, default="demo_program", help="Base name for generated artifacts")
-    p_demo.add_argument("--model", type=str, help="Override the LiteLLM model to use")
-    p_demo.add_argument("--mock-llm", action="store_true", help="Use deterministic mock authoring output")
-    p_demo.add_argument("--allow-storage", action="store_true", help="Enable storage capability during runtime execution")
+    selected = argv[0] if argv and argv[0] in _COMMANDS else None
+    for name, (help_text, _, _) in _COMMANDS.items():
+        p = sub.add_parser(name, help=help_text)
+        if selected is None or name == selected:
+            _add_command_args(p, name)
 
     return parser
 
 
+def _fast_parse(argv: Sequence[str]) -> Optional[SimpleNamespace]:
+    """Parse well-formed `apl <command> ...` invocations without argparse.
+
+    Returns None for anything it does not fully understand (help flags, unknown
+    or abbreviated options, missing arguments) so argparse can handle it and
+    report errors the usual way.
+    """
+    spec = _COMMANDS.get(argv[0]) if argv else None
+    if spec is None:
+        return None
+    _, positional_specs, options = spec
+    values: Dict[str, Any] = {dest: default for dest, _, default, _ in options.values()}
+    positionals = []
+    tokens = iter(argv[1:])
+    for token in tokens:
+        if token.startswith("-"):
+            name, eq, inline = token.partition("=")
+            option = options.get(name)
+            if option is None:
+                return None
+            dest, kind, _, _ = option
+            if kind is None:
+                if eq:
+                    return None
+                values[dest] = True
+                continue
+            value = inline if eq else next(tokens, None)
+            if value is None:
+                return None
+            values[dest] = kind(value)
+        else:
+            positionals.append(token)
+    required = sum(1 for name, _ in positional_specs if not name.endswith("?"))
+    if not required <= len(positionals) <= len(positional_specs):
+        return None
+    if any(value is _REQUIRED for value in values.values()):
+        return None
+    for idx, (name, _) in enumerate(positional_specs):
+        values[name.rstrip("?")] = Path(positionals[idx]) if idx < len(positionals) else None
+    return SimpleNamespace(command=argv[0], **values)
+
+
 def main(argv: Sequence[str] | None = None) -> None:
-    load_env_defaults()
-    parser = build_parser()
-    args = parser.parse_args(argv)
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = None
+    args = _fast_parse(argv)
+    if args is None:
+        parser = build_parser(argv)
+        args = parser.parse_args(argv)
+    # .env defaults are only read once a command that needs them was parsed, so
+    # `apl`, `apl --help` and usage errors never touch the filesystem
+    if args.command in _ENV_COMMANDS:
+        load_env_defaults()
 
     if args.command == "validate":
         _cmd_validate(args.file)
     elif args.command == "translate":
-        _cmd_translate(args.file, strict=getattr(args, "strict", False))
+        _cmd_translate(args.file, strict=getattr(args, "strict", False), soa=getattr(args, "soa", False))
     elif args.command == "run":
         _cmd_run(args.file, allow_storage=args.allow_storage, strict=getattr(args, "strict", False))
     elif args.command == "compile":
@@ -282,7 +492,7 @@ def main(argv: Sequence[str] | None = None) -> None:
             getattr(args, "allow_storage", False),
         )
     else:
-        parser.print_help()
+        (parser or build_parser()).print_help()
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -2,55 +2,42 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
-from textwrap import indent
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
+from ._json import dump
 from .ast import Program, Task, Step
 from .ir import to_langgraph_ir, _validate_ir
 
 
-def _format_step(step: Step) -> str:
-    return (
-        "Step(\n"
-        f"    raw={step.raw!r},\n"
-        f"    assignment={step.assignment!r},\n"
-        f"    action={step.action!r},\n"
-        f"    args={step.args!r},\n"
-        f"    requires={step.requires!r},\n"
-        ")"
-    )
-
-
-def _format_task(task: Task) -> str:
-    steps_repr = ",\n".join(indent(_format_step(step), "        ") for step in task.steps)
-    return (
-        "Task(\n"
-        f"    name={task.name!r},\n"
-        f"    args={task.args!r},\n"
-        f"    precondition={task.precondition!r},\n"
-        f"    postcondition={task.postcondition!r},\n"
-        f"    steps=[\n{steps_repr}\n    ],\n"
-        ")"
-    )
-
-
-def compile_to_python_module(program: Program) -> str:
-    """Emit a Python module that reconstructs the program and exposes run()."""
-    tasks_payload = ",\n".join(indent(_format_task(task), "    ") for task in program.tasks)
-    return f'''"""Compiled APL program (auto-generated)."""
-
-from apl.ast import Program, Task, Step
-from apl.runtime import Runtime
-
-PROGRAM = Program(
-    name={program.name!r},
-    meta={program.meta!r},
-    tasks=[
-{tasks_payload}
+def _emit_step(out: List[str], step: Step) -> None:
+    out.append("            Step(\n")
+    out.append(f"                raw={step.raw!r},\n")
+    out.append(f"                assignment={step.assignment!r},\n")
+    out.append(f"                action={step.action!r},\n")
+    out.append(f"                args={step.args!r},\n")
+    out.append(f"                requires={step.requires!r},\n")
+    out.append("            )")
+
+
+def _emit_task(out: List[str], task: Task) -> None:
+    out.append("    Task(\n")
+    out.append(f"        name={task.name!r},\n")
+    out.append(f"        args={task.args!r},\n")
+    out.append(f"        precondition={task.precondition!r},\n")
+    out.append(f"        postcondition={task.postcondition!r},\n")
+    out.append("        steps=[\n")
+    for idx, step in enumerate(task.steps):
+        if idx:
+            out.append(",\n")
+        _emit_step(out, step)
+    out.append("\n        ],\n")
+    out.append("    )")
+
+
+_MODULE_FOOTER = '''
     ],
-)
+))
 
 
 def run(runtime: Runtime | None = None):
@@ -59,16 +46,47 @@ def run(runtime: Runtime | None = None):
 '''
 
 
+def compile_to_python_module(program: Program) -> str:
+    """Emit a Python module that reconstructs the program and exposes run()."""
+    # the module is emitted in one pass into a list of fragments, already indented
+    out = [
+        '"""Compiled APL program (auto-generated)."""\n'
+        "\n"
+        "from apl.ast import Program, Task, Step\n"
+        "from apl.runtime import Runtime, prepare_program\n"
+        "\n"
+        "PROGRAM = prepare_program(Program(\n",
+        f"    name={program.name!r},\n",
+        f"    meta={program.meta!r},\n",
+        "    tasks=[\n",
+    ]
+    for idx, task in enumerate(program.tasks):
+        if idx:
+            out.append(",\n")
+        _emit_task(out, task)
+    out.append(_MODULE_FOOTER)
+    return "".join(out)
+
+
+# write buffers well above io.DEFAULT_BUFFER_SIZE so streamed output is flushed
+# in a few large syscalls
+_IR_WRITE_BUFFER = 1024 * 1024
+_PYTHON_WRITE_BUFFER = 256 * 1024
+
+
 def write_compiled_artifacts(
     program: Program,
     python_out: Optional[Path] = None,
     ir_path: Optional[Path] = None,
     python_path: Optional[Path] = None,
+    ir_payload: Optional[Dict[str, Any]] = None,
 ) -> None:
     """Write compiled artifacts (Python module, IR JSON) to the filesystem.
 
     Backwards-compatible parameter aliases:
     - python_path is accepted as an alias for python_out to match older tests.
+    Pass `ir_payload` when the caller already built the program's IR to avoid
+    regenerating it.
     This function validates the produced IR against the canonical pydantic model
     and fails fast if validation errors are detected.
     """
@@ -78,10 +96,12 @@ def write_compiled_artifacts(
 
     if python_out:
         python_out.parent.mkdir(parents=True, exist_ok=True)
-        python_out.write_text(compile_to_python_module(program), encoding="utf-8")
+        with open(python_out, "w", encoding="utf-8", buffering=_PYTHON_WRITE_BUFFER) as handle:
+            handle.write(compile_to_python_module(program))
     if ir_path:
         ir_path.parent.mkdir(parents=True, exist_ok=True)
-        payload = to_langgraph_ir(program)
+        payload = ir_payload if ir_payload is not None else to_langgraph_ir(program)
         # validate IR schema before writing to disk
         _validate_ir(payload)
-        ir_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        with open(ir_path, "wb", buffering=_IR_WRITE_BUFFER) as handle:
+            dump(payload, handle)
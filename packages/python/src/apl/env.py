@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Dict, Iterable, List, Optional
 
 _ENV_LOADED = False
 
@@ -17,21 +17,113 @@ def _iter_candidate_paths() -> Iterable[Path]:
         yield repo_root / ".env"
 
 
+def _env_cache_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "apl" / "env.cache"
+
+
+def _read_bytes(path: Path) -> bytes:
+    # raw fd reads skip the BufferedReader that Path.read_bytes builds; typical
+    # .env files fit in the first read
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return b"".join(chunks)
+
+
+def _parse_env_file(env_path: Path) -> Dict[str, str]:
+    values: Dict[str, str] = {}
+    # parse raw bytes and decode only the keys and values that are kept
+    for line in _read_bytes(env_path).split(b"\n"):
+        line = line.strip()
+        if not line or line[:1] == b"#" or b"=" not in line:
+            continue
+        key, _, value = line.partition(b"=")
+        values.setdefault(key.strip().decode("utf-8"), value.strip().decode("utf-8"))
+    return values
+
+
+def _read_env_cache(cache_key: List[Any]) -> Optional[Dict[str, str]]:
+    from ._json import loads
+
+    try:
+        cached = loads(_read_bytes(_env_cache_path()))
+    except Exception:
+        return None
+    if not isinstance(cached, dict) or cached.get("sources") != cache_key:
+        return None
+    return cached.get("values")
+
+
+def _write_env_cache(cache_key: List[Any], values: Dict[str, str]) -> None:
+    from ._json import dumps
+
+    cache_path = _env_cache_path()
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # the cache holds secrets copied from .env files; keep it owner-only
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(dumps({"sources": cache_key, "values": values}))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # caching is best-effort
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+
 def load_env_defaults() -> None:
-    """Populate os.environ with KEY=VALUE pairs from common .env locations."""
+    """Populate os.environ with KEY=VALUE pairs from common .env locations.
+
+    Parsed values are cached under ~/.cache/apl/env.cache (or $XDG_CACHE_HOME)
+    keyed by each source file's path, mtime and size; set APL_NO_ENV_CACHE to
+    always re-read the files.
+    """
     global _ENV_LOADED
     if _ENV_LOADED:
         return
     _ENV_LOADED = True
+    sources = []
     for env_path in _iter_candidate_paths():
-        if not env_path.exists():
+        try:
+            stat = env_path.stat()
+        except OSError:
             continue
-        for line in env_path.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            if not line or line.startswith("#") or "=" not in line:
-                continue
-            key, value = line.split("=", 1)
-            os.environ.setdefault(key.strip(), value.strip())
+        sources.append((env_path, [str(env_path), stat.st_mtime_ns, stat.st_size]))
+    if not sources:
+        return
+    cache_key = [entry for _, entry in sources]
+    use_cache = not os.environ.get("APL_NO_ENV_CACHE")
+    values = _read_env_cache(cache_key) if use_cache else None
+    if values is None:
+        values = {}
+        for env_path, _ in sources:
+            for key, value in _parse_env_file(env_path).items():
+                values.setdefault(key, value)
+        if use_cache:
+            _write_env_cache(cache_key, values)
+    for key, value in values.items():
+        os.environ.setdefault(key, value)
+
+
+def reset_env_defaults() -> None:
+    """Let the next `load_env_defaults` call read the .env files again.
+
+    Values it already copied into os.environ stay; use this when a test or a
+    long-lived process changes the .env files.
+    """
+    global _ENV_LOADED
+    _ENV_LOADED = False
 
 
 def resolve_env_value(value: Any) -> Any:
@@ -39,3 +131,19 @@ def resolve_env_value(value: Any) -> Any:
     if isinstance(value, str) and value.startswith("env:"):
         return os.getenv(value[4:], "")
     return value
+
+
+def resolve_env_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve 'env:VAR' strings in a mapping, returning it unchanged when none occur."""
+    if not any(
+        isinstance(value, str) and value.startswith("env:") for value in values.values()
+    ):
+        return values
+    return {
+        key: (
+            os.getenv(value[4:], "")
+            if isinstance(value, str) and value.startswith("env:")
+            else value
+        )
+        for key, value in values.items()
+    }
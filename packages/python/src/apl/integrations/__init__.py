@@ -0,0 +1 @@
+"""Adapters that connect the APL runtime to external tools and services."""
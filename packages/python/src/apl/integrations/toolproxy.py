@@ -17,11 +17,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Protocol, Any, Dict, Optional, List
 
-@dataclass
+@dataclass(slots=True)
 class StorageResult:
     status: str
     key: Optional[str] = None
-    meta: Dict[str, Any] = None
+    meta: Optional[Dict[str, Any]] = None
 
 class ToolProxy(Protocol):
     """Protocol / interface for runtime adapters.
@@ -62,11 +62,14 @@ class MockStorageProxy:
             raise RuntimeError(f"MockStorageProxy only supports 'store' tool, got '{tool}'")
         key = args.get("key") or args.get("path") or "item"
         content = args.get("content") or args.get("value") or ""
+        # the dict display below is already the cheapest way to build meta;
+        # only skip the str() call for the common str payload
+        size = len(content) if isinstance(content, str) else len(str(content))
         meta = {
             "requesting_task": context.get("task"),
             "agent": context.get("agent"),
             "key": key,
-            "size": len(str(content)),
+            "size": size,
             "base_path": self.base_path,
         }
         return StorageResult(status="ok", key=key, meta=meta)
@@ -3,46 +3,73 @@
 from __future__ import annotations
 
 import hashlib
-import json
-from typing import Any, Dict, List
+import os
+from functools import lru_cache
+from sys import intern
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .ast import Program
-from pydantic import BaseModel, Field, ValidationError
-from typing import Optional
+from ._json import dumps_canonical
+from .ast import Program, Task
 
 # IMPLEMENTED: IR schema validation & provenance notes
-# - Lightweight pydantic models (NodeModel, IRModel) are defined below and used
-#   by _validate_ir(payload) to validate the IR emitted by to_langgraph_ir().
+# - Lightweight pydantic models (NodeModel, IRModel) are built by _ir_models()
+#   and used by _validate_ir(payload) to validate the IR emitted by
+#   to_langgraph_ir(). pydantic is imported on first validation only, so
+#   translating or hashing IR never pays its import cost.
 # - to_langgraph_ir() computes a deterministic ir_hash over canonicalized nodes,
 #   edges and generator metadata and attaches it to the payload for provenance.
 # - Recommendation / future work (documented in docs/DESIGN_PRINCIPLES.md):
 #   * Optionally publish docs/apl-spec/ir-schema.json for CI schema checks.
-#   * Migrate pydantic.parse_obj -> IRModel.model_validate for pydantic v2 compatibility.
 # - The presence of _validate_ir keeps validation close to the serializer and
 #   enables clearer diagnostics during compile/translation time.
-class NodeModel(BaseModel):
-    id: str
-    task: str
-    kind: str
-    input: Optional[Any] = None
-    assignment: Optional[str] = None
-    requires: List[str] = Field(default_factory=list)
-    source: str
-
-class IRModel(BaseModel):
-    program: str
-    meta: Dict[str, Any]
-    generator: str
-    schema_version: str
-    nodes: List[NodeModel]
-    edges: List[List[str]]
-    ir_hash: Optional[str] = None
+@lru_cache(maxsize=None)
+def _ir_models() -> Tuple[Any, Any, Any]:
+    """Build (NodeModel, IRModel, ValidationError) on first use."""
+    from pydantic import BaseModel, Field, ValidationError
+
+    class NodeModel(BaseModel):
+        id: str
+        task: str
+        kind: str
+        input: Optional[Any] = None
+        assignment: Optional[str] = None
+        requires: List[str] = Field(default_factory=list)
+        source: str
+
+    class IRModel(BaseModel):
+        program: str
+        meta: Dict[str, Any]
+        generator: str
+        schema_version: str
+        nodes: List[NodeModel]
+        edges: List[List[str]]
+        ir_hash: Optional[str] = None
+
+    return NodeModel, IRModel, ValidationError
+
+
+def __getattr__(name: str) -> Any:
+    if name == "NodeModel":
+        return _ir_models()[0]
+    if name == "IRModel":
+        return _ir_models()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def _validate_ir(payload: Dict[str, Any]) -> None:
-    """Validate IR payload against pydantic models; raise RuntimeError on failure."""
+    """Validate IR payload against pydantic models; raise RuntimeError on failure.
+
+    Set APL_SKIP_IR_VALIDATION to skip the check for IR produced by
+    to_langgraph_ir(), which is trusted.
+    """
+    if os.environ.get("APL_SKIP_IR_VALIDATION", "").lower() in {"1", "true", "yes"}:
+        return
+    _, ir_model, validation_error = _ir_models()
+    # pydantic v2 renamed parse_obj; prefer the new name to avoid deprecation warnings
+    validate = getattr(ir_model, "model_validate", None) or ir_model.parse_obj
     try:
-        IRModel.parse_obj(payload)
-    except ValidationError as exc:
+        validate(payload)
+    except validation_error as exc:
         raise RuntimeError(f"IR schema validation failed: {exc}") from exc
 
 # Keep a stable generator identifier in sync with setup.py version
@@ -50,50 +77,115 @@ _GENERATOR = "apl/0.1.0"
 _SCHEMA_VERSION = "1.0"
 
 
+_GENERATOR_B = _GENERATOR.encode("utf-8")
+# step indices are small; reuse their encoded form instead of str(i).encode() per node
+_INDEX_BYTES = tuple(str(i).encode("ascii") for i in range(256))
+_NODE_ID_PERSON = b"apl-ir"
+_CALL_LLM = "call_llm"
+
+
 def _deterministic_node_id(program_name: str, task_name: str, index: int, step_source: str) -> str:
-    """Create a stable node id from program/task/index/source and generator."""
-    m = hashlib.sha256()
-    m.update(_GENERATOR.encode("utf-8"))
-    m.update(b"|")
-    m.update(program_name.encode("utf-8"))
-    m.update(b"|")
-    m.update(task_name.encode("utf-8"))
-    m.update(b"|")
-    m.update(str(index).encode("utf-8"))
-    m.update(b"|")
-    m.update(step_source.encode("utf-8"))
-    return m.hexdigest()
-
-
-def _compute_ir_hash(payload: Dict[str, Any]) -> str:
-    """Compute a deterministic hash for the IR payload."""
-    normalized = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
-    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    """Create a stable node id from program/task/index/source and generator.
+
+    The fields are joined with "|" and hashed once with a 128-bit BLAKE2b
+    (32 hex characters) personalised for APL IR node ids.
+    """
+    buf = b"|".join(
+        (
+            _GENERATOR_B,
+            program_name.encode("utf-8"),
+            task_name.encode("utf-8"),
+            _INDEX_BYTES[index] if index < 256 else str(index).encode("ascii"),
+            step_source.encode("utf-8"),
+        )
+    )
+    return hashlib.blake2b(buf, digest_size=16, person=_NODE_ID_PERSON).hexdigest()
+
+
+def _node_id_prefix(program_name: str, task_name: str) -> "hashlib._Hash":
+    """Hasher already fed with the per-task part of `_deterministic_node_id`'s input."""
+    prefix = hashlib.blake2b(digest_size=16, person=_NODE_ID_PERSON)
+    prefix.update(b"|".join((_GENERATOR_B, program_name.encode("utf-8"), task_name.encode("utf-8"), b"")))
+    return prefix
+
+
+def _hash_members(members: Iterable[Tuple[str, Any]]) -> str:
+    """sha256 of the canonical JSON object made of `members`, given in sorted key order.
+
+    Members are serialized and fed to the hasher one at a time, producing the same
+    digest as hashing ``dumps_canonical(dict(members))`` without building the dict
+    or the full document.
+    """
+    digest = hashlib.sha256()
+    sep = b"{"
+    for key, value in members:
+        digest.update(sep)
+        digest.update(dumps_canonical(key))
+        digest.update(b":")
+        digest.update(dumps_canonical(value))
+        sep = b","
+    digest.update(b"}" if sep == b"," else b"{}")
+    return digest.hexdigest()
+
+
+def _task_node_ids(program: Program) -> Iterator[Tuple[Task, List[str]]]:
+    """Yield each task with the deterministic ids of its steps."""
+    for task in program.tasks:
+        # the generator/program/task prefix is hashed once per task; each step
+        # only mixes in "index|source" on a copy (same digest as _deterministic_node_id)
+        prefix = _node_id_prefix(program.name, task.name)
+        node_ids = []
+        for s_idx, step in enumerate(task.steps):
+            m = prefix.copy()
+            m.update(_INDEX_BYTES[s_idx] if s_idx < 256 else str(s_idx).encode("ascii"))
+            m.update(b"|")
+            m.update(step.raw.encode("utf-8"))
+            node_ids.append(m.hexdigest())
+        yield task, node_ids
+
+
+def _shared_requires(cache: Dict[Tuple[str, ...], Tuple[str, ...]], requires: List[str]) -> Tuple[str, ...]:
+    key = tuple(requires)
+    shared = cache.get(key)
+    if shared is None:
+        shared = cache[key] = tuple([intern(req) for req in key])
+    return shared
 
 
 def to_langgraph_ir(program: Program) -> Dict[str, Any]:
-    """Serialize to a LangGraph-inspired JSON structure (deterministic where possible)."""
+    """Serialize to a LangGraph-inspired JSON structure (deterministic where possible).
+
+    Each node's ``requires`` is a tuple (a JSON array once serialized) that may be
+    shared with other nodes having the same requirements; copy it before editing.
+    """
     nodes: List[Dict[str, Any]] = []
     edges: List[List[str]] = []
-
-    for t_idx, task in enumerate(program.tasks):
-        prev_id: str | None = None
-        for s_idx, step in enumerate(task.steps):
-            node_id = _deterministic_node_id(program.name, task.name, s_idx, step.raw)
-            nodes.append(
-                {
-                    "id": node_id,
-                    "task": task.name,
-                    "kind": step.action or "call_llm",
-                    "input": step.args,
-                    "assignment": step.assignment,
-                    "requires": step.requires,
-                    "source": step.raw,
-                }
-            )
-            if prev_id:
-                edges.append([prev_id, node_id])
-            prev_id = node_id
+    # hash-consed requirement tuples: nodes with equal requirements share one
+    # immutable tuple (most are empty), never the AST's own lists
+    req_lists: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    for task, node_ids in _task_node_ids(program):
+        # one shared task-name object per task and one per distinct action keep
+        # repeated node fields from holding separate copies of the same string
+        task_name = intern(task.name)
+        # a dict display with constant keys compiles to BUILD_CONST_KEY_MAP, which
+        # reuses one constant key tuple (hashes cached); it beats dict(zip(keys, ...)).
+        # Step fields are read with plain attribute loads: on slotted dataclasses
+        # they specialize to slot reads, which beat an attrgetter tuple + unpack.
+        nodes.extend(
+            {
+                "id": node_id,
+                "task": task_name,
+                "kind": intern(step.action) if step.action else _CALL_LLM,
+                "input": step.args,
+                "assignment": step.assignment,
+                "requires": _shared_requires(req_lists, step.requires),
+                "source": step.raw,
+            }
+            for node_id, step in zip(node_ids, task.steps)
+        )
+        # steps within a task are chained sequentially
+        edges.extend([src, dst] for src, dst in zip(node_ids, node_ids[1:]))
 
     payload = {
         "program": program.name,
@@ -105,6 +197,52 @@ def to_langgraph_ir(program: Program) -> Dict[str, Any]:
     }
 
     # attach an IR-level hash for provenance/audit
-    payload["ir_hash"] = _compute_ir_hash({"nodes": payload["nodes"], "edges": payload["edges"], "generator": payload["generator"]})
+    payload["ir_hash"] = _hash_members((("edges", edges), ("generator", _GENERATOR), ("nodes", nodes)))
+
+    return payload
 
+
+_SOA_COLUMNS = ("ids", "tasks", "kinds", "inputs", "assignments", "requires", "sources")
+
+
+def to_langgraph_ir_soa(program: Program) -> Dict[str, Any]:
+    """Serialize to the same graph as `to_langgraph_ir` with nodes stored column-wise.
+
+    Node i is described by ``ids[i]``, ``tasks[i]``, ``kinds[i]``, ``inputs[i]``,
+    ``assignments[i]``, ``requires[i]`` and ``sources[i]``, so consumers that scan
+    one field read a single list and the payload carries a constant number of keys
+    regardless of program size. ``ir_hash`` covers the columns, edges and generator.
+    """
+    ids: List[str] = []
+    tasks: List[str] = []
+    kinds: List[str] = []
+    inputs: List[Optional[str]] = []
+    assignments: List[Optional[str]] = []
+    requires: List[Tuple[str, ...]] = []
+    sources: List[str] = []
+    edges: List[List[str]] = []
+    req_lists: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    for task, node_ids in _task_node_ids(program):
+        ids.extend(node_ids)
+        tasks.extend([intern(task.name)] * len(node_ids))
+        for step in task.steps:
+            kinds.append(intern(step.action) if step.action else _CALL_LLM)
+            inputs.append(step.args)
+            assignments.append(step.assignment)
+            requires.append(_shared_requires(req_lists, step.requires))
+            sources.append(step.raw)
+        edges.extend([src, dst] for src, dst in zip(node_ids, node_ids[1:]))
+
+    columns = dict(zip(_SOA_COLUMNS, (ids, tasks, kinds, inputs, assignments, requires, sources)))
+    payload: Dict[str, Any] = {
+        "program": program.name,
+        "meta": program.meta,
+        "generator": _GENERATOR,
+        "schema_version": _SCHEMA_VERSION,
+        "layout": "soa",
+        **columns,
+        "edges": edges,
+    }
+    payload["ir_hash"] = _hash_members(sorted((*columns.items(), ("edges", edges), ("generator", _GENERATOR))))
     return payload
@@ -0,0 +1,128 @@
+"""Request-batching LLM adapter for the APL runtime."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .env import load_env_defaults
+
+try:  # pragma: no cover - import guarded for optional dependency
+    import litellm
+except Exception:  # pragma: no cover - handled at call site
+    litellm = None
+
+
+BatchFn = Callable[[List[str], str], List[str]]
+
+
+def _litellm_batch(prompts: List[str], model: str) -> List[str]:
+    """Send prompts to LiteLLM's batch_completion and return the message contents."""
+    if litellm is None:
+        raise RuntimeError(
+            "LiteLLM is not installed. Install with `pip install litellm` or pass a custom batch_fn."
+        )
+    responses = litellm.batch_completion(
+        model=model,
+        messages=[[{"role": "user", "content": prompt}] for prompt in prompts],
+    )
+    try:
+        return [response["choices"][0]["message"]["content"] for response in responses]
+    except Exception as exc:  # pragma: no cover - defensive
+        raise RuntimeError(
+            f"Unexpected LiteLLM batch response structure: {responses}"
+        ) from exc
+
+
+class BatchingLLM:
+    """Coalesce concurrent `acall` prompts into a single batch request.
+
+    Prompts awaited within `flush_interval_ms` of each other (for example from
+    parallel DAG branches in `Runtime.execute_program_async`) are sent together,
+    one batch per model, and a model's batch is flushed early once `max_batch`
+    of its prompts are queued. The synchronous `call` sends a batch of one.
+
+    Usage:
+      runtime = Runtime(llm=BatchingLLM(model="gpt-4o-mini"))
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        batch_fn: Optional[BatchFn] = None,
+        flush_interval_ms: float = 20.0,
+        max_batch: int = 32,
+    ) -> None:
+        load_env_defaults()
+        self.model = (
+            model
+            or os.getenv("APL_LLM_MODEL")
+            or os.getenv("LITELLM_MODEL")
+            or "gpt-4o-mini"
+        )
+        self.batch_fn = batch_fn or _litellm_batch
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_batch = max_batch
+        # queued (prompt, future) pairs per model
+        self._pending: Dict[str, List[Tuple[str, "asyncio.Future[str]"]]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # the event loop only keeps weak references to tasks, so in-flight
+        # dispatches are held here until they finish
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    def call(self, prompt: str, model: Optional[str] = None) -> str:
+        return self.batch_fn([prompt.strip()], model or self.model)[0]
+
+    async def acall(self, prompt: str, model: Optional[str] = None) -> str:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[str]" = loop.create_future()
+        model = model or self.model
+        queue = self._pending.setdefault(model, [])
+        queue.append((prompt.strip(), future))
+        if len(queue) >= self.max_batch:
+            self._dispatch_queued(model)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for model in list(self._pending):
+            self._dispatch_queued(model)
+
+    def _dispatch_queued(self, model: str) -> None:
+        batch = self._pending.pop(model, None)
+        if not self._pending and self._flush_handle is not None:
+            # nothing left for the timer; a handle left pending would outlive the
+            # event loop and block scheduling on the next one
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch, model))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(
+        self, batch: List[Tuple[str, "asyncio.Future[str]"]], model: str
+    ) -> None:
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            results = await asyncio.to_thread(self.batch_fn, prompts, model)
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"LLM batch returned {len(results)} results for {len(batch)} prompts."
+                )
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+__all__ = ["BatchingLLM"]
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
-import json
-from typing import Any, Dict, List, Optional
+import http.client
+import select
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 from urllib import request, error as url_error, parse
 
+from ._json import dumps, loads
 from .ast import Program, Task
 
 
@@ -13,32 +16,162 @@ class N8NError(RuntimeError):
     """Raised when an n8n API call fails."""
 
 
+# methods that may be re-sent when a reused connection drops before the response
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+def _connection_dropped(conn: http.client.HTTPConnection) -> bool:
+    """Return True when the server has closed an idle keep-alive connection.
+
+    An idle connection has nothing to read, so a readable socket means EOF (or
+    stray data) and the connection must not carry another request.
+    """
+    sock = conn.sock
+    if sock is None:
+        return False
+    try:
+        return bool(select.select([sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
 class N8NClient:
-    """Minimal HTTP client for triggering n8n webhooks and workflows."""
+    """Minimal HTTP client for triggering n8n webhooks and workflows.
+
+    Requests reuse keep-alive connections from a small per-client pool, so
+    bursts of webhook calls from one runtime skip repeated TCP/TLS handshakes.
+    When an HTTP(S) proxy is configured in the environment, requests go through
+    urllib instead so the proxy settings apply. Share one client between
+    runtimes (``Runtime(n8n_client=...)``) to share its pool; as a context
+    manager it closes the pooled connections on exit.
+    """
 
-    def __init__(self, base_url: str, api_key: str | None = None, timeout: float = 10.0):
+    def __init__(self, base_url: str, api_key: str | None = None, timeout: float = 10.0, pool_size: int = 4):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.timeout = timeout
+        self.pool_size = pool_size
+        parts = parse.urlsplit(self.base_url)
+        if not parts.scheme or not parts.netloc:
+            raise ValueError(f"n8n base_url must be an absolute URL, got {base_url!r}")
+        # request paths are absolute, so like urljoin they replace any base path
+        self._origin = f"{parts.scheme}://{parts.netloc}"
+        self._scheme = parts.scheme
+        self._host = parts.hostname or ""
+        self._port = parts.port
+        self._use_pool = self._scheme in {"http", "https"} and (
+            self._scheme not in request.getproxies() or bool(request.proxy_bypass(self._host))
+        )
+        self._idle: List[http.client.HTTPConnection] = []
+        self._pool_lock = threading.Lock()
 
     def _make_url(self, path: str) -> str:
         if not path.startswith("/"):
             path = f"/{path}"
-        return parse.urljoin(self.base_url, path)
+        return self._origin + path
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        conn_cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+        return conn_cls(self._host, self._port, timeout=self.timeout)
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._pool_lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if not _connection_dropped(conn):
+                    return conn, True
+                conn.close()
+        return self._new_connection(), False
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._pool_lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def warm(self, connections: int = 1) -> None:
+        """Open keep-alive connections ahead of the first request.
+
+        The TCP (and TLS) handshakes happen here, so the first webhook call from
+        a freshly started runtime does not pay for them.
+        """
+        if not self._use_pool:
+            return
+        for _ in range(min(connections, self.pool_size)):
+            conn = self._new_connection()
+            try:
+                conn.connect()
+            except OSError as exc:
+                conn.close()
+                raise N8NError(f"n8n connection to {self.base_url} failed: {exc}") from exc
+            self._release(conn)
+
+    def close(self) -> None:
+        """Close pooled keep-alive connections."""
+        with self._pool_lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def __enter__(self) -> "N8NClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def _perform_request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         url = self._make_url(path)
-        data: Optional[bytes] = None
+        data = dumps(payload, indent=False) if payload is not None else None
         headers = {"Content-Type": "application/json"}
         if self.api_key:
             headers["X-N8N-API-KEY"] = self.api_key
-        if payload is not None:
-            data = json.dumps(payload).encode("utf-8")
+        if not self._use_pool:
+            return self._perform_urllib(url, method, data, headers)
+        target = url[len(self._origin):]
+        method = method.upper()
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request(method, target, body=data, headers=headers)
+            except (ConnectionResetError, BrokenPipeError) as exc:
+                conn.close()
+                if reused:
+                    # the server dropped an idle keep-alive connection before the
+                    # request went out; retry on a fresh one
+                    continue
+                raise N8NError(f"n8n request to {url} failed: {exc}") from exc
+            except (OSError, http.client.HTTPException) as exc:  # pragma: no cover - network errors require integration tests
+                conn.close()
+                raise N8NError(f"n8n request to {url} failed: {exc}") from exc
+            try:
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError) as exc:
+                conn.close()
+                # the request may already have reached n8n, so only idempotent
+                # methods are sent again (a repeated POST would fire the webhook twice)
+                if reused and method in _IDEMPOTENT_METHODS:
+                    continue
+                raise N8NError(f"n8n request to {url} failed: {exc}") from exc
+            except (OSError, http.client.HTTPException) as exc:  # pragma: no cover - network errors require integration tests
+                conn.close()
+                raise N8NError(f"n8n request to {url} failed: {exc}") from exc
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            # http.client does not follow redirects, and a redirected webhook did not run
+            if resp.status >= 300:
+                raise N8NError(f"n8n request to {url} failed: {resp.status} {resp.reason}")
+            return loads(body) if body else {}
+
+    def _perform_urllib(self, url: str, method: str, data: Optional[bytes], headers: Dict[str, str]) -> Dict[str, Any]:
         req = request.Request(url, data=data, headers=headers, method=method.upper())
         try:
             with request.urlopen(req, timeout=self.timeout) as resp:
-                body = resp.read().decode("utf-8")
-                return json.loads(body) if body else {}
+                body = resp.read()
+                return loads(body) if body else {}
         except url_error.HTTPError as exc:  # pragma: no cover - network errors require integration tests
             raise N8NError(f"n8n request to {url} failed: {exc.code} {exc.reason}") from exc
         except url_error.URLError as exc:  # pragma: no cover
@@ -57,16 +190,13 @@ class N8NClient:
         return self._perform_request("POST", endpoint, payload=payload or {})
 
 
-def _collect_trigger_tasks(program: Program) -> List[Task]:
-    tasks: List[Task] = []
-    for task in program.tasks:
-        meta = task.metadata.get("n8n") if hasattr(task, "metadata") else None
-        if not meta:
-            continue
-        trigger = meta.get("trigger")
-        if trigger:
-            tasks.append(task)
-    return tasks
+def _collect_trigger_tasks(program: Program) -> List[Tuple[Task, Dict[str, Any]]]:
+    """Return (task, trigger metadata) for every task annotated with `# n8n: trigger ...`."""
+    return [
+        (task, trigger)
+        for task in program.tasks
+        if (meta := task.metadata.get("n8n")) and (trigger := meta.get("trigger"))
+    ]
 
 
 def to_n8n_workflow(program: Program, runtime_url: str | None = None) -> Dict[str, Any]:
@@ -83,8 +213,7 @@ def to_n8n_workflow(program: Program, runtime_url: str | None = None) -> Dict[st
 
     default_runtime_url = runtime_url or "={{ $json.aplRuntimeUrl || $env.APL_RUNTIME_URL }}"
 
-    for index, task in enumerate(trigger_tasks, start=1):
-        trigger_meta = task.metadata["n8n"]["trigger"]
+    for index, (task, trigger_meta) in enumerate(trigger_tasks, start=1):
         trigger_type = trigger_meta.get("type", "webhook")
         config = trigger_meta.get("config", {})
         node_base_name = task.name.replace(".", "_")
@@ -120,14 +249,15 @@ def to_n8n_workflow(program: Program, runtime_url: str | None = None) -> Dict[st
                 "method": "POST",
                 "sendBody": True,
                 "jsonParameters": True,
-                "bodyParametersJson": json.dumps(
+                # orjson (when installed) encodes the body in C; non-ASCII text is
+                # emitted as UTF-8 rather than \u escapes on both paths
+                "bodyParametersJson": dumps(
                     {
                         "task": task.name,
                         "args": task.args,
                         "steps": [step.raw for step in task.steps],
-                    },
-                    indent=2,
-                ),
+                    }
+                ).decode("utf-8"),
             },
             "id": f"HttpRequest_{index}",
             "name": http_node_name,
@@ -155,7 +285,7 @@ def to_n8n_workflow(program: Program, runtime_url: str | None = None) -> Dict[st
         "connections": connections,
         "settings": {
             "executionOrder": "v1",
-            "errorWorkflow": program.meta.get("n8n", {}).get("errorWorkflow") if hasattr(program, "meta") else None,
+            "errorWorkflow": program.meta.get("n8n", {}).get("errorWorkflow"),
         },
         "meta": {
             "apl": {
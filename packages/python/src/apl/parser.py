@@ -30,20 +30,50 @@ Replace with a full parser (lark/ANTLR) for production.
 #   precise line/column provenance and provides an opt-in `--parser=lark` flag.
 #   This preserves backward compatibility while improving editor/LSP integration.
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Union
+from pathlib import Path
+import hashlib
+import os
+import pickle
 import re
+import string
+from sys import intern
 
 # import shared AST dataclasses from package root
 from .ast import Program, Task, Step
 
-_agent_re = re.compile(r'^\s*agent\s+([A-Za-z0-9_]+)(?:\s*\((.*?)\))?(?:\s+binds\s+(.*?))?\s*:\s*$', re.IGNORECASE)
-_def_re = re.compile(r'^\s*def\s+([A-Za-z0-9_]+)\s*\((.*?)\)\s*:\s*$', re.IGNORECASE)
-_program_re = re.compile(r'^\s*program\s+([A-Za-z0-9_]+)(?:\((.*?)\))?', re.IGNORECASE)
+# Classifies a stripped line in a single match; `m.lastgroup` names the construct.
+# Lines matching none of the alternatives are steps (or top-level fallback lines).
+_line_re = re.compile(
+    r'^(?:'
+    r'(?P<program>program\s+(?P<program_name>[A-Za-z0-9_]+)(?:\((?P<program_meta>.*?)\))?)'
+    r'|(?P<agent>agent\s+(?P<agent_name>[A-Za-z0-9_]+)(?:\s*\((?P<agent_args>.*?)\))?(?:\s+binds\s+(?P<binds>.*?))?\s*:\s*$)'
+    r'|(?P<capability>capability )'
+    r'|(?P<def>def\s+(?P<def_name>[A-Za-z0-9_]+)\s*\((?P<def_args>.*?)\)\s*:\s*$)'
+    r'|(?P<end>end$)'
+    r'|(?P<precondition>precondition:)'
+    r'|(?P<postcondition>postcondition:)'
+    r')',
+    re.IGNORECASE,
+)
+_HEADER_PREFIXES = frozenset({"pro", "age", "cap", "def", "end", "pre", "pos"})
 _requires_re = re.compile(r'.*requires\s+capability\.([A-Za-z0-9_]+)', re.IGNORECASE)
-_assign_call_re = re.compile(r'^\s*([A-Za-z0-9_]+)\s*=\s*(.+)$')  # left = right
 _call_re = re.compile(r'^\s*([A-Za-z0-9_.]+)\s*\((.*)\)\s*$', re.IGNORECASE)
 _string_line_re = re.compile(r'^\s*["\'](.*)["\']\s*$')
+# Step lines in one match: optional `left =` assignment, then either a call
+# `action(args)` or any other right-hand side (a separate `left = right` match
+# followed by _call_re on the right side, fused).
+_step_re = re.compile(
+    r'^\s*(?:(?P<left>[A-Za-z0-9_]+)\s*=\s*)?'
+    r'(?P<right>(?P<action>[A-Za-z0-9_.]+)\s*\((?P<args>.*)\)\s*$|.+)$'
+)
 _n8n_comment_re = re.compile(r'^\s*#\s*n8n:\s*(.+)$', re.IGNORECASE)
+_program_meta_re = re.compile(r'([A-Za-z0-9_]+)\s*=\s*"(.*?)"')
+_requires_clause_re = re.compile(r'\s*requires\s+capability\.[A-Za-z0-9_]+', re.IGNORECASE)
+_kv_pair_re = re.compile(r'([A-Za-z0-9_]+)\s*=\s*(".*?"|\'.*?\'|[^\s]+)')
+_BIND_ALIAS_CHARS = frozenset(string.ascii_letters + string.digits + "_")
+_BIND_PATH_CHARS = _BIND_ALIAS_CHARS | {"."}
+_bind_pair_re = re.compile(r'([A-Za-z0-9_.]+)\s+as\s+([A-Za-z0-9_]+)', re.IGNORECASE)
 
 
 def _strip_quotes(value: str) -> str:
@@ -53,18 +83,24 @@ def _strip_quotes(value: str) -> str:
 
 
 def _parse_kv_pairs(text: str) -> Dict[str, str]:
-    pairs: Dict[str, str] = {}
-    for key, raw_val in re.findall(r'([A-Za-z0-9_]+)\s*=\s*(".*?"|\'.*?\'|[^\s]+)', text):
-        pairs[key] = _strip_quotes(raw_val)
-    return pairs
+    return {key: _strip_quotes(raw_val) for key, raw_val in _kv_pair_re.findall(text)}
 
 
 def _merge_metadata(dest: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
-    for key, value in update.items():
-        if key in dest and isinstance(dest[key], dict) and isinstance(value, dict):
-            dest[key] = _merge_metadata(dict(dest[key]), value)
-        else:
-            dest[key] = value
+    """Deep-merge `update` into `dest` in place and return `dest`.
+
+    Callers own `dest` and pass freshly parsed `update` dicts, so nested dicts
+    are merged where they are instead of being copied level by level.
+    """
+    stack = [(dest, update)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            current = target.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                stack.append((current, value))
+            else:
+                target[key] = value
     return dest
 
 
@@ -103,62 +139,144 @@ def _parse_binds(binds_text: str) -> Dict[str, str]:
     if not binds_text:
         return {}
     out = {}
-    parts = [p.strip() for p in binds_text.split(',') if p.strip()]
-    for p in parts:
-        # expect pattern "<path> as <alias>"
-        m = re.match(r'([A-Za-z0-9_.]+)\s+as\s+([A-Za-z0-9_]+)', p, re.IGNORECASE)
+    for p in binds_text.split(','):
+        p = p.strip()
+        if not p:
+            continue
+        # expect pattern "<path> as <alias>"; the plain three-token form is split
+        # directly and anything else goes through the regex
+        fields = p.split(None, 2)
+        if (
+            len(fields) == 3
+            and fields[1].lower() == "as"
+            and _BIND_PATH_CHARS.issuperset(fields[0])
+            and _BIND_ALIAS_CHARS.issuperset(fields[2])
+        ):
+            out[fields[2]] = fields[0]
+            continue
+        m = _bind_pair_re.match(p)
         if m:
             out[m.group(2)] = m.group(1)
         else:
             # fallback: treat the whole thing as a tool name mapped to itself
-            key = p.split('.')[-1]
-            out[key] = p
+            out[p.rpartition('.')[2]] = p
     return out
 
-def parse_apl(text: str) -> Program:
-    lines = text.splitlines()
+
+def _parse_step(s: str) -> Step:
+    """Parse a stripped step line inside a def/task body."""
+    # support explicit "step ..." prefix used in examples/tests
+    raw_step = s
+    step_line = s
+    if step_line[:5].lower() == "step ":
+        step_line = step_line[5:].strip()
+
+    # split an explicit assignment like "x = something" (after removing the
+    # optional "step " prefix) and recognise obj.method(...) / call_llm(...)
+    # calls on the right side in a single match
+    m = _step_re.match(step_line)
+    if m:
+        left, right, action, args = m.groups()
+        right = right.strip()
+    else:
+        left, right, action, args = None, step_line, None, None
+
+    # detect requires capability on the same line
+    reqs = []
+    # the pattern starts with a greedy `.*`, so anchoring it at 0 finds the same
+    # (last) clause; search() would retry from every offset on lines without one
+    rq = _requires_re.match(right)
+    if rq:
+        reqs.append(intern(rq.group(1)))
+        # remove the requires clause and re-parse the call without it
+        right = _requires_clause_re.sub('', right).strip()
+        mcall = _call_re.match(right)
+        action = mcall.group(1) if mcall else None
+        args = mcall.group(2) if mcall else None
+
+    if action is None:
+        # string-literal only lines are treated as fallback prompts (match against the original raw step)
+        mstr = _string_line_re.match(step_line)
+        if mstr:
+            action = "call_llm"
+            args = f'prompt="{mstr.group(1)}"'
+            left = None  # fallback prompts typically not assigned
+        else:
+            # treat as expression or inline tool call (e.g., news.search(query))
+            # use the raw right side as a fallback action
+            action = None
+            args = right
+
+    # action names repeat across steps (call_llm, store, tool.method); interning
+    # lets every Step share one object and keeps the action-kind lookup on the
+    # identity fast path. Assigned names are interned too, so runtime variable
+    # keys are the same objects as the identifiers expressions look them up by
+    if action is not None:
+        action = intern(action)
+    if left:
+        left = intern(left)
+    # positional fields (raw, assignment, action, args, requires): the slotted
+    # dataclass __init__ binds them about twice as fast as keywords
+    return Step(raw_step, left, action, args, reqs)
+
+
+def parse_apl(text: Union[str, Iterable[str]]) -> Program:
+    """Parse APL source given as a string or as an iterable of lines.
+
+    Lines may keep their trailing newline, so an open text file can be passed
+    directly and is consumed one line at a time (see `parse_apl_file`).
+    """
+    lines = text.splitlines() if isinstance(text, str) else text
     program_name = "__unnamed__"
     program_meta: Dict[str, Any] = {}
     program = None
 
     current_agent: Optional[str] = None
     current_task: Optional[Task] = None
+    # steps list of current_task, cached at state transitions
+    current_steps: List[Step] = []
+    main_task: Optional[Task] = None
     pending_task_meta: Dict[str, Any] = {}
 
     for raw in lines:
-        ln = raw.rstrip("\n")
-        s = ln.strip()
-
-        m_n8n = _n8n_comment_re.match(ln)
-        if m_n8n:
-            meta_update = _parse_n8n_comment(m_n8n.group(1))
-            if current_task:
-                current_task.metadata = _merge_metadata(dict(current_task.metadata), meta_update)
-            else:
-                pending_task_meta = _merge_metadata(dict(pending_task_meta), meta_update)
+        s = raw.strip()
+
+        if not s:
+            continue
+        if s[0] == "#":
+            # only comment lines can carry n8n annotations; `$` also matches before
+            # a trailing newline, so iterable input needs no rstrip
+            m_n8n = _n8n_comment_re.match(raw)
+            if m_n8n:
+                meta_update = _parse_n8n_comment(m_n8n.group(1))
+                if current_task:
+                    _merge_metadata(current_task.metadata, meta_update)
+                else:
+                    _merge_metadata(pending_task_meta, meta_update)
             continue
 
-        if not s or s.startswith("#"):
+        # every header keyword has a distinct 3-letter prefix; most step lines
+        # fail this set lookup and never reach the header regex
+        m = _line_re.match(s) if s[:3].lower() in _HEADER_PREFIXES else None
+        kind = m.lastgroup if m else None
+        if kind is None and current_task:
+            # plain step line: the common case skips every header branch below
+            current_steps.append(_parse_step(s))
             continue
 
         # program header
-        m = _program_re.match(s)
-        if m and program is None:
-            program_name = m.group(1)
-            meta_raw = m.group(2) or ""
-            meta = {}
-            for pair in re.findall(r'([A-Za-z0-9_]+)\s*=\s*"(.*?)"', meta_raw):
-                meta[pair[0]] = pair[1]
-            program_meta.update(meta)
+        if kind == "program" and program is None:
+            program_name = m.group("program_name")
+            meta_raw = m.group("program_meta") or ""
+            program_meta.update(_program_meta_re.findall(meta_raw))
             program = Program(name=program_name, meta=program_meta)
             continue
 
         # agent header
-        m = _agent_re.match(s)
-        if m:
-            agent_name = m.group(1)
-            agent_args = (m.group(2) or "").strip()
-            binds = (m.group(3) or "").strip()
+        if kind == "agent":
+            agent_name = m.group("agent_name")
+            agent_args = (m.group("agent_args") or "").strip()
+            binds = (m.group("binds") or "").strip()
             if program is None:
                 program = Program(name=program_name, meta=program_meta)
             # register agent binds in program.meta
@@ -181,7 +299,7 @@ def parse_apl(text: str) -> Program:
 
         # def inside agent -> becomes a Task named "<agent>.<def>"
         # Also process capability declarations inside agent blocks when not inside a def
-        if current_agent and not current_task and s.lower().startswith("capability "):
+        if kind == "capability" and current_agent and not current_task:
             cap = s.split(None, 1)[1].strip()
             agents = program.meta.get("agents", {})
             ag = agents.get(current_agent, {})
@@ -192,103 +310,108 @@ def parse_apl(text: str) -> Program:
             agents[current_agent] = ag
             program.meta["agents"] = agents
             continue
-        m = _def_re.match(s)
-        if m and current_agent:
-            def_name = m.group(1)
-            argstr = m.group(2) or ""
+        if kind == "def" and current_agent:
+            def_name = m.group("def_name")
+            argstr = m.group("def_args") or ""
             args = [a.strip() for a in argstr.split(',') if a.strip()]
             task_name = f"{current_agent}.{def_name}"
-            task = Task(name=task_name, args=args)
+            task = Task(task_name, args)
             if program is None:
                 program = Program(name=program_name, meta=program_meta)
             program.tasks.append(task)
             if pending_task_meta:
-                task.metadata = _merge_metadata(dict(task.metadata), pending_task_meta)
+                _merge_metadata(task.metadata, pending_task_meta)
                 pending_task_meta = {}
             current_task = task
+            current_steps = task.steps
             continue
 
         # end of agent block (not strict because we use ':' delim) - treat 'end' as reset
-        if s.lower() == "end":
+        if kind == "end":
             current_agent = None
             current_task = None
             continue
 
         # precondition/postcondition lines (attach to current task if present)
-        if s.lower().startswith("precondition:") and current_task:
+        if kind == "precondition" and current_task:
             current_task.precondition = s.split(":", 1)[1].strip()
             continue
-        if s.lower().startswith("postcondition:") and current_task:
+        if kind == "postcondition" and current_task:
             current_task.postcondition = s.split(":", 1)[1].strip()
             continue
 
         # inside a def/task, parse steps and assignments
         if current_task:
-            # support explicit "step ..." prefix used in examples/tests
-            raw_step = s
-            step_line = s
-            if step_line.lower().startswith("step "):
-                step_line = step_line[5:].strip()
-
-            # check for explicit assignment like "x = something" (after removing optional "step " prefix)
-            m = _assign_call_re.match(step_line)
-            if m:
-                left = m.group(1).strip()
-                right = m.group(2).strip()
-            else:
-                left = None
-                right = step_line
-
-            # detect requires capability on the same line
-            reqs = []
-            rq = _requires_re.search(right)
-            if rq:
-                reqs.append(rq.group(1))
-                # remove the requires clause for action parsing
-                right = re.sub(r'\s*requires\s+capability\.[A-Za-z0-9_]+', '', right, flags=re.IGNORECASE).strip()
-
-            # if right is a function call pattern like obj.method(...) or call_llm(...)
-            mcall = _call_re.match(right)
-            if mcall:
-                action = mcall.group(1)
-                args = mcall.group(2)
-            else:
-                # string-literal only lines are treated as fallback prompts (match against the original raw step)
-                mstr = _string_line_re.match(step_line)
-                if mstr:
-                    action = "call_llm"
-                    args = f'prompt="{mstr.group(1)}"'
-                    left = None  # fallback prompts typically not assigned
-                else:
-                    # treat as expression or inline tool call (e.g., news.search(query))
-                    # use the raw right side as a fallback action
-                    action = None
-                    args = right
-
-            step = Step(raw=raw_step, assignment=left, action=action, args=args, requires=reqs)
-            current_task.steps.append(step)
+            current_steps.append(_parse_step(s))
             continue
 
         # global-level fallback: create a top-level task "main" if not present and add step
         if program is None:
             program = Program(name=program_name, meta=program_meta)
-        # ensure a main task exists
-        main_task = None
-        for t in program.tasks:
-            if t.name == "main":
-                main_task = t
-                break
+        # ensure a main task exists; only this fallback creates a task named "main"
+        # (def tasks are always "<agent>.<def>"), so it is remembered once created
         if main_task is None:
             main_task = Task(name="main", args=[])
             program.tasks.append(main_task)
         # treat line as a step in main
         mstr = _string_line_re.match(s)
         if mstr:
-            step = Step(raw=s, assignment=None, action="call_llm", args=f'prompt="{mstr.group(1)}"')
+            step = Step(s, None, "call_llm", f'prompt="{mstr.group(1)}"')
         else:
-            step = Step(raw=s, assignment=None, action=None, args=s)
+            step = Step(s, None, None, s)
         main_task.steps.append(step)
 
     if program is None:
         program = Program(name=program_name, meta=program_meta)
     return program
+
+
+_PARSE_READ_BUFFER = 1 << 16
+
+
+def parse_apl_file(path: Path) -> Program:
+    """Parse an APL file by streaming its lines instead of reading it into one string."""
+    with open(path, "r", encoding="utf-8", buffering=_PARSE_READ_BUFFER) as handle:
+        return parse_apl(handle)
+
+
+# Bump when the AST layout or parser output changes so stale caches are ignored.
+_PARSE_CACHE_VERSION = 2
+
+
+def _parse_cache_path(digest: str) -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "apl" / "ast" / f"{digest}.pkl"
+
+
+def load_or_parse(path: Path) -> Program:
+    """Parse an APL file, reusing a pickled AST when the same source was parsed before.
+
+    Caches live under ~/.cache/apl/ast (or $XDG_CACHE_HOME), one owner-only file
+    per SHA-256 of the source text, so only files this user wrote are unpickled;
+    unreadable caches are ignored and rewritten on a best-effort basis.
+    """
+    text = path.read_text(encoding="utf-8")
+    digest = hashlib.sha256(f"{_PARSE_CACHE_VERSION}\0{text}".encode("utf-8")).hexdigest()
+    cache_path = _parse_cache_path(digest)
+    try:
+        with cache_path.open("rb") as fh:
+            program = pickle.load(fh)
+        if isinstance(program, Program):
+            return program
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        pass
+    program = parse_apl(text)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(program, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+    return program
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
-import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from ._json import dumps
+from .ast import Program
 from .authoring import LiteLLMAuthor, AuthoringConfig
 from .parser import parse_apl
 from .compiler import write_compiled_artifacts
@@ -28,6 +30,19 @@ class PipelineArtifacts:
     outputs: Dict[str, Any]
 
 
+def _write_n8n_workflow(program: Program, name: str, n8n_path: Path) -> None:
+    try:
+        workflow = to_n8n_workflow(program)
+    except ValueError as exc:
+        workflow = {
+            "name": name,
+            "warning": str(exc),
+            "nodes": [],
+            "connections": {},
+        }
+    n8n_path.write_bytes(dumps(workflow))
+
+
 def run_pipeline(
     prompt: str,
     out_dir: Path,
@@ -53,19 +68,7 @@ def run_pipeline(
 
     python_path = out_dir / f"{name}.py"
     ir_path = out_dir / f"{name}.json"
-    write_compiled_artifacts(program, python_out=python_path, ir_path=ir_path)
-
-    try:
-        workflow = to_n8n_workflow(program)
-    except ValueError as exc:
-        workflow = {
-            "name": name,
-            "warning": str(exc),
-            "nodes": [],
-            "connections": {},
-        }
     n8n_path = out_dir / f"{name}_n8n.json"
-    n8n_path.write_text(json.dumps(workflow, indent=2), encoding="utf-8")
 
     runtime = Runtime(allow_storage=allow_storage)
     if seed_vars:
@@ -74,13 +77,22 @@ def run_pipeline(
         for arg in task.args:
             runtime.vars.setdefault(arg, None)
 
-    try:
-        outputs = runtime.execute_program(program)
-    except Exception as exc:
-        outputs = {"error": str(exc)}
+    # artifact writing and the n8n export only read the parsed program, so they
+    # run on worker threads while the program executes (typically waiting on LLM I/O)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        compiled = pool.submit(
+            write_compiled_artifacts, program, python_out=python_path, ir_path=ir_path
+        )
+        exported = pool.submit(_write_n8n_workflow, program, name, n8n_path)
+        try:
+            outputs = runtime.execute_program(program)
+        except Exception as exc:
+            outputs = {"error": str(exc)}
+        compiled.result()
+        exported.result()
 
     run_path = out_dir / f"{name}_run.json"
-    run_path.write_text(json.dumps(outputs, indent=2), encoding="utf-8")
+    run_path.write_bytes(dumps(outputs))
 
     return PipelineArtifacts(
         prompt_path=prompt_path,
@@ -2,23 +2,480 @@
 
 from __future__ import annotations
 
-import json
 import os
 import re
 import ast
-from typing import Dict, Any, Optional, TYPE_CHECKING, List
+import operator
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import lru_cache
+from typing import Callable, Deque, Dict, Any, FrozenSet, Iterator, Optional, TYPE_CHECKING, List, Set, Tuple
 from .integrations.toolproxy import ToolProxy, StorageResult
 
-from .ast import Program, Step
-from .env import load_env_defaults, resolve_env_value
+from ._json import dumps
+from .ast import Program, Task, Step
+from .env import load_env_defaults, resolve_env_values
+
+try:
+    from mypy_extensions import mypyc_attr
+except ImportError:  # pragma: no cover - mypy_extensions ships with mypy, which the native build needs
+
+    def mypyc_attr(*attrs: str, **kwattrs: object) -> Callable[[Any], Any]:  # type: ignore[misc]
+        return lambda cls: cls
+
 
 if TYPE_CHECKING:  # pragma: no cover - typing only
+    import asyncio
+
     from .n8n import N8NClient
 
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_FETCH_ARG_RE = re.compile(r'["\'](.*?)["\']')
+_PROMPT_RE = re.compile(r'prompt\s*=\s*"(.*)"')
+_TEMPLATE_RE = re.compile(r'\{\{([A-Za-z0-9_]+)\}\}')
+# sentinel for action-cache misses (cached results may legitimately be None)
+_MISS = object()
+
+_SAFE_FUNCS: Dict[str, Any] = {
+    "len": len,
+    "min": min,
+    "max": max,
+    "sum": sum,
+    "int": int,
+    "float": float,
+    "str": str,
+    "bool": bool,
+}
+_SAFE_GLOBALS: Dict[str, Any] = {"__builtins__": None, **_SAFE_FUNCS}
+
+
+_COMPREHENSION_ERROR = "Comprehensions and generator expressions are not allowed."
+_IMPORT_ERROR = "Import/global/nonlocal statements are not allowed."
+_DISALLOWED_EXPR_NODES: Dict[type, str] = {
+    ast.Attribute: "Attribute access is not allowed in expressions.",
+    ast.Lambda: "Lambda expressions are not allowed.",
+    ast.Import: _IMPORT_ERROR,
+    ast.ImportFrom: _IMPORT_ERROR,
+    ast.Global: _IMPORT_ERROR,
+    ast.Nonlocal: _IMPORT_ERROR,
+    ast.ListComp: _COMPREHENSION_ERROR,
+    ast.DictComp: _COMPREHENSION_ERROR,
+    ast.SetComp: _COMPREHENSION_ERROR,
+    ast.GeneratorExp: _COMPREHENSION_ERROR,
+}
+
+
+_EXPR_CALL_ERROR = f"Function calls are restricted. Allowed: {sorted(_SAFE_FUNCS.keys())}"
+_KWARG_COMPREHENSION_ERROR = "Comprehensions are not allowed in kwargs."
+_DISALLOWED_KWARG_NODES: Dict[type, str] = {
+    ast.Attribute: "Attribute access is not allowed in kwargs.",
+    ast.ListComp: _KWARG_COMPREHENSION_ERROR,
+    ast.DictComp: _KWARG_COMPREHENSION_ERROR,
+    ast.SetComp: _KWARG_COMPREHENSION_ERROR,
+    ast.GeneratorExp: _KWARG_COMPREHENSION_ERROR,
+}
+_KWARG_CALL_ERROR = "Function calls in kwargs are restricted."
+
+
+def _check_ast(root: ast.AST, disallowed: Dict[type, str], call_error: str) -> None:
+    """Raise RuntimeError for the first disallowed node or non-whitelisted call under `root`."""
+    # iterative pre-order walk: one dict probe per node instead of a chain of
+    # isinstance checks and a Python call per child (AST node classes are final)
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        message = disallowed.get(type(node))
+        if message is not None:
+            raise RuntimeError(message)
+        if type(node) is ast.Call:
+            func = node.func
+            if type(func) is not ast.Name or func.id not in _SAFE_FUNCS:
+                raise RuntimeError(call_error)
+        children = list(ast.iter_child_nodes(node))
+        children.reverse()
+        stack.extend(children)
+
+
+def _validate_expr_node(root: ast.AST) -> None:
+    _check_ast(root, _DISALLOWED_EXPR_NODES, _EXPR_CALL_ERROR)
+
+
+def _validate_kwarg_node(root: ast.AST) -> None:
+    _check_ast(root, _DISALLOWED_KWARG_NODES, _KWARG_CALL_ERROR)
+
+
+_Evaluator = Callable[[Dict[str, Any]], Any]
+
+_BIN_OPS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS: Dict[type, Callable[[Any], Any]] = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+_CMP_OPS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+
+
+class _Unsupported(Exception):
+    """Raised by `_build_evaluator` for nodes handled by the eval fallback."""
+
+
+def _build_evaluator(node: ast.AST) -> _Evaluator:
+    """Turn a validated expression node into a closure over the variables mapping."""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda values: value
+    if isinstance(node, ast.Name):
+        name = node.id
+
+        def _name(values: Dict[str, Any]) -> Any:
+            if name in values:
+                return values[name]
+            if name in _SAFE_FUNCS:
+                return _SAFE_FUNCS[name]
+            raise NameError(f"name '{name}' is not defined")
+
+        return _name
+    if isinstance(node, ast.BoolOp):
+        operands = [_build_evaluator(v) for v in node.values]
+        is_and = isinstance(node.op, ast.And)
+
+        def _boolop(values: Dict[str, Any]) -> Any:
+            result = None
+            for operand in operands:
+                result = operand(values)
+                if bool(result) is not is_and:
+                    return result
+            return result
+
+        return _boolop
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        binop = _BIN_OPS[type(node.op)]
+        left, right = _build_evaluator(node.left), _build_evaluator(node.right)
+        return lambda values: binop(left(values), right(values))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        unop = _UNARY_OPS[type(node.op)]
+        operand = _build_evaluator(node.operand)
+        return lambda values: unop(operand(values))
+    if isinstance(node, ast.Compare) and all(type(op) in _CMP_OPS for op in node.ops):
+        first = _build_evaluator(node.left)
+        chain = [(_CMP_OPS[type(op)], _build_evaluator(c)) for op, c in zip(node.ops, node.comparators)]
+
+        def _compare(values: Dict[str, Any]) -> Any:
+            left = first(values)
+            result: Any = True
+            for cmp, right_eval in chain:
+                right = right_eval(values)
+                result = cmp(left, right)
+                if not result:
+                    return result
+                left = right
+            return result
+
+        return _compare
+    if isinstance(node, ast.Subscript):
+        target, index = _build_evaluator(node.value), _build_evaluator(node.slice)
+        return lambda values: target(values)[index(values)]
+    if isinstance(node, ast.Slice):
+        bounds = [_build_evaluator(b) if b is not None else None for b in (node.lower, node.upper, node.step)]
+        return lambda values: slice(*(b(values) if b is not None else None for b in bounds))
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = (_build_evaluator(n) for n in (node.test, node.body, node.orelse))
+        return lambda values: body(values) if test(values) else orelse(values)
+    if isinstance(node, (ast.List, ast.Tuple)) and not any(isinstance(e, ast.Starred) for e in node.elts):
+        items = [_build_evaluator(e) for e in node.elts]
+        if isinstance(node, ast.Tuple):
+            return lambda values: tuple(item(values) for item in items)
+        return lambda values: [item(values) for item in items]
+    if isinstance(node, ast.Dict) and None not in node.keys:
+        pairs = [(_build_evaluator(k), _build_evaluator(v)) for k, v in zip(node.keys, node.values) if k is not None]
+        return lambda values: {k(values): v(values) for k, v in pairs}
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        if not any(isinstance(a, ast.Starred) for a in node.args):
+            func = _SAFE_FUNCS[node.func.id]
+            args = [_build_evaluator(a) for a in node.args]
+            return lambda values: func(*(arg(values) for arg in args))
+    raise _Unsupported(type(node).__name__)
+
+
+@lru_cache(maxsize=1024)
+def _compile_expr(expr: str) -> _Evaluator:
+    """Parse and validate an expression once per distinct source string.
+
+    Returns a closure tree built by `_build_evaluator`; expressions using nodes it
+    does not cover fall back to evaluating a compiled code object.
+    """
+    try:
+        parsed = ast.parse(expr, mode="eval")
+    except SyntaxError as exc:
+        raise RuntimeError(f"Expression eval error in '{expr}': {exc}") from exc
+    _validate_expr_node(parsed)
+    try:
+        return _build_evaluator(parsed.body)
+    except _Unsupported:
+        code = compile(parsed, "<apl-safe-eval>", "eval")
+        return lambda values: eval(code, _SAFE_GLOBALS, values)
+
+
+# kwarg values written as these nodes can never evaluate to an "env:VAR" string
+_STATIC_KWARG_NODES = (ast.Constant, ast.List, ast.Tuple, ast.Dict, ast.Set)
+
+
+@lru_cache(maxsize=1024)
+def _compile_kwargs(args: str) -> Tuple[Tuple[Tuple[str, _Evaluator], ...], bool]:
+    """Parse and validate a `key=value, ...` argument list once per distinct source string.
+
+    Returns (name, evaluator) pairs plus whether any value is computed and may
+    still need `resolve_env_values`; values are evaluated against the variables
+    mapping by the caller, so cached plans never capture runtime state. Literal
+    "env:VAR" values become evaluators that read the variable at call time.
+    """
+    try:
+        parsed = ast.parse(f"dict({args})", mode="eval")
+    except SyntaxError as exc:
+        raise RuntimeError(f"Failed to parse kwargs for '{args}': {exc}") from exc
+    call = parsed.body
+    if not isinstance(call, ast.Call):
+        raise RuntimeError("Malformed kwargs expression.")
+    if not isinstance(call.func, ast.Name) or call.func.id != "dict":
+        raise RuntimeError("Expected kwargs in key=value form.")
+    pairs: List[Tuple[str, _Evaluator]] = []
+    dynamic = False
+    for kw in call.keywords:
+        if kw.arg is None:
+            raise RuntimeError("Only simple keyword arguments are supported (no **kwargs).")
+        _validate_kwarg_node(kw.value)
+        value = kw.value
+        if isinstance(value, ast.Constant) and isinstance(value.value, str) and value.value.startswith("env:"):
+
+            def read_env(values: Dict[str, Any], name: str = value.value[4:]) -> Any:
+                return os.getenv(name, "")
+
+            pairs.append((kw.arg, read_env))
+            continue
+        if not isinstance(value, _STATIC_KWARG_NODES):
+            dynamic = True
+        try:
+            evaluate = _build_evaluator(value)
+        except _Unsupported:
+            expr_node = ast.fix_missing_locations(ast.Expression(body=value))
+            code = compile(expr_node, "<apl-safe-kwargs>", "eval")
+
+            def evaluate(values: Dict[str, Any], code: Any = code) -> Any:
+                return eval(code, _SAFE_GLOBALS, values)
+
+        pairs.append((kw.arg, evaluate))
+    return tuple(pairs), dynamic
+
+
+class _TemplateVars:
+    """format_map view over runtime variables; fields are `{_<name>}`, missing names render empty."""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: Dict[str, Any]) -> None:
+        self._values = values
+
+    def __getitem__(self, field_name: str) -> Any:
+        return self._values.get(field_name[1:], "")
+
+
+class ActionKind(IntEnum):
+    """Built-in action families; the value indexes the runtime's handler table."""
+
+    FETCH = 0
+    CALL_LLM = 1
+    STORE = 2
+    ASSERT = 3
+    CUSTOM = 4
+    N8N = 5
+    SLACK = 6
+
+
+_ACTION_KINDS = {
+    "fetch": ActionKind.FETCH,
+    "call_llm": ActionKind.CALL_LLM,
+    "store": ActionKind.STORE,
+    "assert": ActionKind.ASSERT,
+}
+_N8N_WEBHOOK_SUBACTIONS = frozenset({"trigger_webhook", "webhook"})
+_N8N_WORKFLOW_SUBACTIONS = frozenset({"call_workflow", "workflow"})
+# dotted actions are routed by their namespace (the part before the first ".")
+_NAMESPACE_KINDS = {
+    "n8n": ActionKind.N8N,
+    "slack": ActionKind.SLACK,
+}
+# store/assert have side effects or observe state, so they run in program order
+_ORDERED_KINDS = frozenset({ActionKind.STORE, ActionKind.ASSERT})
+# Runtime handler method names, indexed by ActionKind
+_HANDLER_NAMES = ("_do_fetch", "_do_call_llm", "_do_store", "_do_assert", "_do_custom", "_do_n8n", "_do_slack")
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledStep:
+    """Execution plan derived once from a step's source text.
+
+    For `call_llm`, `template` is the prompt as a `str.format_map` string with one
+    `{_<name>}` field per `{{name}}` placeholder (listed in `template_vars`); when
+    there are no placeholders it is the prompt verbatim. `target` holds the fetch URL,
+    or for n8n actions the N8NClient method the sub-action routes to ("" if unsupported).
+    """
+
+    action: str
+    kind: ActionKind = ActionKind.CUSTOM
+    template: str = ""
+    template_vars: Tuple[str, ...] = ()
+    target: str = ""
+
+
+def compile_step(step: Step) -> CompiledStep:
+    """Build and attach the execution plan for a step."""
+    action = step.action or ""
+    if not action.islower():
+        # parser-interned names are normally lowercase already; keep them as-is
+        action = action.lower()
+    kind = _ACTION_KINDS.get(action)
+    if kind is None:
+        namespace, dot, _ = action.partition(".")
+        kind = _NAMESPACE_KINDS.get(namespace, ActionKind.CUSTOM) if dot else ActionKind.CUSTOM
+    args = step.args or ""
+    if kind is ActionKind.CALL_LLM:
+        match = _PROMPT_RE.search(args)
+        prompt = match.group(1) if match else args
+        pieces = _TEMPLATE_RE.split(prompt)
+        names = tuple(pieces[1::2])
+        if names:
+            # even pieces are literals (braces escaped), odd pieces are variable names;
+            # the "_" prefix keeps names such as "0" from being read as positional fields
+            prompt = "".join(
+                "{_" + piece + "}" if i % 2 else piece.replace("{", "{{").replace("}", "}}")
+                for i, piece in enumerate(pieces)
+            )
+        compiled = CompiledStep(action, kind, template=prompt, template_vars=names)
+    elif kind is ActionKind.FETCH:
+        match = _FETCH_ARG_RE.search(args)
+        compiled = CompiledStep(action, kind, target=match.group(1) if match else args)
+    elif kind is ActionKind.N8N:
+        sub_action = action[4:]
+        if sub_action in _N8N_WEBHOOK_SUBACTIONS:
+            route = "trigger_webhook"
+        elif sub_action in _N8N_WORKFLOW_SUBACTIONS:
+            route = "call_workflow"
+        else:
+            route = ""
+        compiled = CompiledStep(action, kind, target=route)
+    else:
+        compiled = CompiledStep(action, kind)
+    step.compiled = compiled
+    return compiled
+
+
+def prepare_program(program: Program) -> Program:
+    """Compile step plans and warm the expression cache for a loaded program.
+
+    Steps are otherwise compiled lazily on first execution. Invalid expressions
+    are skipped here; they still raise when evaluated.
+    """
+    for task in program.tasks:
+        exprs = [task.precondition, task.postcondition]
+        for step in task.steps:
+            compile_step(step)
+            raw = step.raw.strip()
+            if raw.lower().startswith("return "):
+                exprs.append(raw[len("return ") :].strip())
+        for expr in exprs:
+            if not expr:
+                continue
+            try:
+                _compile_expr(expr)
+            except RuntimeError:
+                continue
+    return program
+
+
+def _step_dependencies(steps: List[Step]) -> List[Set[int]]:
+    """Return, for each step, the indices of earlier steps it must wait for.
+
+    A step depends on the latest earlier step assigning any identifier found in
+    its args (including `{{var}}` templates), on earlier readers/writers of the
+    variable it assigns, and on the most recent ordered action (store/assert).
+    """
+    last_writer: Dict[str, int] = {}
+    readers: Dict[str, List[int]] = {}
+    barrier: Optional[int] = None
+    deps: List[Set[int]] = []
+    for idx, step in enumerate(steps):
+        names = set(_IDENT_RE.findall(step.args or ""))
+        needs = {last_writer[name] for name in names if name in last_writer}
+        if step.assignment:
+            if step.assignment in last_writer:
+                needs.add(last_writer[step.assignment])
+            needs.update(readers.get(step.assignment, ()))
+        if (step.compiled or compile_step(step)).kind in _ORDERED_KINDS:
+            needs.update(range(idx))
+            barrier = idx
+        elif barrier is not None:
+            needs.add(barrier)
+        needs.discard(idx)
+        deps.append(needs)
+        for name in names:
+            readers.setdefault(name, []).append(idx)
+        if step.assignment:
+            last_writer[step.assignment] = idx
+    return deps
+
+
+def _independent_llm_steps(program: Program) -> List[List[Step]]:
+    """Return, per task, the call_llm steps whose prompt no part of the program can change.
+
+    A prompt qualifies when none of its `{{var}}` placeholders is assigned by a
+    step or exposed as a task result. Steps with declared requirements and tasks
+    guarded by a precondition are left out, since they may never run.
+    """
+    written: Set[str] = set()
+    for task in program.tasks:
+        _, dot, def_name = task.name.partition(".")
+        written.add(def_name if dot else task.name)
+        written.update(step.assignment for step in task.steps if step.assignment)
+    independent: List[List[Step]] = []
+    for task in program.tasks:
+        steps: List[Step] = []
+        if not task.precondition:
+            for step in task.steps:
+                plan = step.compiled or compile_step(step)
+                if plan.kind is ActionKind.CALL_LLM and not step.requires and written.isdisjoint(plan.template_vars):
+                    steps.append(step)
+        independent.append(steps)
+    return independent
+
 
 class MockLLM:
     """Deterministic mock LLM used for testing and offline execution."""
 
+    __slots__ = ("seed",)
+
     def __init__(self, seed: str = "mock"):
         self.seed = seed
 
@@ -26,17 +483,78 @@ class MockLLM:
         prompt = prompt.strip()
         return f"[mocked:{model}] {prompt}"
 
+    async def acall(self, prompt: str, model: str = "mock") -> str:
+        """Async variant used by the async runtime; LLM clients may implement it natively."""
+        return self.call(prompt, model=model)
+
 
+# subclasses override _do_* handlers, so the mypyc build must stay subclassable from Python
+@mypyc_attr(allow_interpreted_subclasses=True)
 class Runtime:
     """Reference runtime that interprets an APL Program."""
 
-    def __init__(self, llm: Optional[MockLLM] = None, allow_storage: bool = False, n8n_client: Optional["N8NClient"] = None, tool_proxy: Optional["ToolProxy"] = None):
+    # fixed attribute layout; subclasses that add attributes get a __dict__ as usual
+    __slots__ = (
+        "llm",
+        "allow_storage",
+        "n8n_client",
+        "tool_proxy",
+        "vars",
+        "_program",
+        "_current_task",
+        "_current_agent",
+        "_agent_capabilities",
+        "_capabilities_source",
+        "_action_cache",
+        "_cache_size",
+        "_cache_lock",
+        "_handlers",
+    )
+
+    def __init__(self, llm: Optional[Any] = None, allow_storage: bool = False, n8n_client: Optional["N8NClient"] = None, tool_proxy: Optional["ToolProxy"] = None, cache: bool = True, cache_size: int = 256):
         load_env_defaults()
         self.llm = llm or MockLLM()
         self.allow_storage = allow_storage
         self.n8n_client = n8n_client
         self.tool_proxy = tool_proxy
         self.vars: Dict[str, Any] = {}
+        self._program: Optional[Program] = None
+        self._current_task: Optional[Task] = None
+        self._current_agent: Optional[str] = None
+        self._agent_capabilities: Dict[str, FrozenSet[str]] = {}
+        # agents metadata the capability map was built from (see _enter_program)
+        self._capabilities_source: Optional[Dict[str, Any]] = None
+        # LRU of deterministic action results keyed by (action, resolved input)
+        self._action_cache: Optional["OrderedDict[Tuple[str, str], Any]"] = OrderedDict() if cache else None
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        # resolved on the concrete class so subclasses can override _do_* handlers
+        self._handlers: Tuple[Callable[[Runtime, Step, CompiledStep], Any], ...] = tuple(
+            getattr(type(self), name) for name in _HANDLER_NAMES
+        )
+
+    def reset(self) -> None:
+        """Drop per-run state while keeping configuration for reuse.
+
+        `vars` is rebound rather than cleared so results already handed out by
+        reference stay intact. Memoized action results are dropped too, so stored
+        LLM replies never leak into an unrelated run; the per-program capability
+        map is kept.
+        """
+        self.vars = {}
+        if self._action_cache is not None:
+            with self._cache_lock:
+                self._action_cache.clear()
+        self._exit_program()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a shallow copy of the per-run variables for a later `restore`."""
+        return self.vars.copy()
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Roll per-run state back to a `snapshot`, keeping configuration and caches."""
+        self.vars = dict(state)
+        self._exit_program()
 
     # --------------------------------------------------------------------- #
     # Execution helpers
@@ -45,41 +563,11 @@ class Runtime:
         """Safely evaluate a restricted expression using ast parsing and validation.
 
         Allows literals, variable names, boolean/arithmetic ops, comparisons,
-        indexing, and calls to a small whitelist of safe functions.
+        indexing, and calls to a small whitelist of safe functions. Validated
+        evaluators are cached per expression source by `_compile_expr`.
         """
-        allowed_funcs = {
-            "len": len,
-            "min": min,
-            "max": max,
-            "sum": sum,
-            "int": int,
-            "float": float,
-            "str": str,
-            "bool": bool,
-        }
-
-        def _validate_node(node: ast.AST) -> None:
-            if isinstance(node, ast.Attribute):
-                raise RuntimeError("Attribute access is not allowed in expressions.")
-            if isinstance(node, ast.Lambda):
-                raise RuntimeError("Lambda expressions are not allowed.")
-            if isinstance(node, (ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal)):
-                raise RuntimeError("Import/global/nonlocal statements are not allowed.")
-            if isinstance(node, ast.Call):
-                if not isinstance(node.func, ast.Name) or node.func.id not in allowed_funcs:
-                    raise RuntimeError(f"Function calls are restricted. Allowed: {sorted(allowed_funcs.keys())}")
-            if isinstance(node, (ast.ListComp, ast.DictComp, ast.SetComp, ast.GeneratorExp)):
-                raise RuntimeError("Comprehensions and generator expressions are not allowed.")
-            for child in ast.iter_child_nodes(node):
-                _validate_node(child)
-
         try:
-            parsed = ast.parse(expr, mode="eval")
-            _validate_node(parsed)
-            compiled = compile(parsed, "<apl-safe-eval>", "eval")
-            safe_globals = {"__builtins__": None}
-            safe_globals.update(allowed_funcs)
-            return eval(compiled, safe_globals, self.vars)
+            return _compile_expr(expr)(self.vars)
         except RuntimeError:
             raise
         except Exception as exc:  # pragma: no cover - provide better error later
@@ -88,188 +576,406 @@ class Runtime:
     def _eval_kwargs(self, args: str) -> Dict[str, Any]:
         """Parse keyword-style arguments like: key1=val1, key2=val2.
 
-        Values are evaluated using the same AST-safe approach to avoid unsafe eval().
+        Values are evaluated using the same AST-safe approach to avoid unsafe eval();
+        the validated per-argument evaluators are cached by `_compile_kwargs`.
         """
         if not args:
             return {}
-
         try:
-            call_src = f"dict({args})"
-            parsed = ast.parse(call_src, mode="eval")
-            if not isinstance(parsed, ast.Expression) or not isinstance(parsed.body, ast.Call):
-                raise RuntimeError("Malformed kwargs expression.")
-            call = parsed.body
-            if not isinstance(call.func, ast.Name) or call.func.id != "dict":
-                raise RuntimeError("Expected kwargs in key=value form.")
-
-            out: Dict[str, Any] = {}
-            for kw in call.keywords:
-                if kw.arg is None:
-                    raise RuntimeError("Only simple keyword arguments are supported (no **kwargs).")
-                expr_node = ast.Expression(body=kw.value)
-                ast.fix_missing_locations(expr_node)
-
-                def _validate_node_local(n: ast.AST) -> None:
-                    if isinstance(n, ast.Attribute):
-                        raise RuntimeError("Attribute access is not allowed in kwargs.")
-                    if isinstance(n, (ast.ListComp, ast.DictComp, ast.SetComp, ast.GeneratorExp)):
-                        raise RuntimeError("Comprehensions are not allowed in kwargs.")
-                    if isinstance(n, ast.Call) and not (isinstance(n.func, ast.Name) and n.func.id in {"len", "min", "max", "sum", "int", "float", "str", "bool"}):
-                        raise RuntimeError("Function calls in kwargs are restricted.")
-                    for c in ast.iter_child_nodes(n):
-                        _validate_node_local(c)
-
-                _validate_node_local(expr_node)
-                compiled = compile(expr_node, "<apl-safe-kwargs>", "eval")
-                safe_globals = {"__builtins__": None, "len": len, "min": min, "max": max, "sum": sum, "int": int, "float": float, "str": str, "bool": bool}
-                value = eval(compiled, safe_globals, self.vars)
-                out[kw.arg] = resolve_env_value(value)
-            return out
+            pairs, dynamic = _compile_kwargs(args)
+            out = {name: evaluate(self.vars) for name, evaluate in pairs}
         except RuntimeError:
             raise
         except Exception as exc:
             raise RuntimeError(f"Failed to parse kwargs for '{args}': {exc}") from exc
+        # literal "env:VAR" values were resolved by their evaluators
+        return resolve_env_values(out) if dynamic else out
 
-    def execute_program(self, program: Program) -> Dict[str, Any]:
+    def execute_program(self, program: Program, collect_per_task: bool = True) -> Dict[str, Any]:
         """Execute a program and return the final variable snapshot per task.
 
         This method records program context so runtime can enforce declared capabilities
-        and provide better runtime diagnostics.
+        and provide better runtime diagnostics. With `collect_per_task=False` only the
+        last task's snapshot is taken, saving a copy of the variables per task.
         """
-        self._program = program
-        # build a quick lookup of declared capabilities per agent
-        self._agent_capabilities: Dict[str, List[str]] = {}
-        agents_meta = program.meta.get("agents", {})
-        for agent_name, info in agents_meta.items():
-            self._agent_capabilities[agent_name] = info.get("capabilities", [])
-
+        self._enter_program(program)
         task_results: Dict[str, Any] = {}
+        variables = self.vars
+        execute_step = self.execute_step
         for task in program.tasks:
-            # set current task/agent context for execute_step
-            self._current_task = task
-            self._current_agent = task.name.split(".", 1)[0] if "." in task.name else None
-
-            if task.precondition and not self._eval_expr(task.precondition):
-                raise RuntimeError(f"Precondition failed for task {task.name}: {task.precondition}")
+            self._enter_task(task)
             last_result: Any = None
             for step in task.steps:
-                # enforce declared capability requirements for each step
-                # NOTE: defer 'storage' checks to execute_step so the runtime can produce
-                # consistent, user-facing error messages and allow runtime-level overrides.
-                for req in step.requires:
-                    if req == "storage":
-                        # execute_step will validate storage capability and runtime.allow_storage
-                        continue
-                    if not self._has_capability(req):
-                        raise RuntimeError(f"Missing required capability '{req}' for task '{task.name}' at step: {step.raw}")
-                result = self.execute_step(step)
+                # most steps declare no requirements; skip the check call for them
+                if step.requires:
+                    self._check_step_requirements(task, step)
+                result = execute_step(step)
                 last_result = result
                 if step.assignment:
-                    self.vars[step.assignment] = result
-            # if the task produced a result but did not assign it to a named variable,
-            # expose it under the task's def name (e.g., agent.fn -> 'fn') for convenience
-            if last_result is not None:
-                def_name = task.name.split(".", 1)[1] if "." in task.name else task.name
-                if def_name not in self.vars:
-                    self.vars[def_name] = last_result
-            if task.postcondition and not self._eval_expr(task.postcondition):
-                raise RuntimeError(f"Postcondition failed for task {task.name}: {task.postcondition}")
-            task_results[task.name] = dict(self.vars)
+                    variables[step.assignment] = result
+            self._exit_task(task, last_result)
+            if collect_per_task:
+                task_results[task.name] = self.vars.copy()
+        if not collect_per_task and program.tasks:
+            task_results[program.tasks[-1].name] = self.vars.copy()
+        self._exit_program()
+        return task_results
+
+    def execute_program_parallel(self, program: Program, max_workers: int = 8) -> Dict[str, Any]:
+        """Execute a program, running data-independent steps of each task concurrently.
+
+        Tasks still run in order; within a task, steps are scheduled from the
+        dependency DAG built by `_step_dependencies`, so wall-clock time is bounded
+        by the critical path instead of the sum of step latencies. Results match
+        `execute_program`.
+
+        While a task runs, the fixed-prompt LLM calls of the next task are started
+        ahead of time (see `_prefetch_llm_calls`). They are speculative: if the
+        current task raises, those already in flight still complete in the
+        background, but queued ones are cancelled and the error is raised without
+        waiting for them.
+        """
+        self._enter_program(program)
+        task_results: Dict[str, Any] = {}
+        independent = _independent_llm_steps(program) if self._action_cache is not None else []
+        # the first task's own calls get no head start, so they are only marked as seen
+        seen: Set[str] = {self._llm_prompt(step) for step in independent[0]} if independent else set()
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            warming: List[Future] = []
+            for idx, task in enumerate(program.tasks):
+                # failed prefetches are ignored; the step repeats the call and raises
+                wait(warming)
+                warming = self._prefetch_llm_calls(independent[idx + 1], seen, pool) if idx + 1 < len(independent) else []
+                self._enter_task(task)
+                results = self._run_steps_parallel(task, pool)
+                self._exit_task(task, results[-1] if results else None)
+                task_results[task.name] = self.vars.copy()
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+        self._exit_program()
+        return task_results
+
+    def _prefetch_llm_calls(self, steps: List[Step], seen: Set[str], pool: ThreadPoolExecutor) -> List[Future]:
+        """Start the given fixed-prompt LLM calls so they overlap the running task.
+
+        Results land in the action cache, where the steps pick them up when their
+        task runs. Prompts already in `seen` are skipped and the new ones added, so
+        each distinct prompt is sent once per program.
+        """
+        futures: List[Future] = []
+        for step in steps:
+            prompt = self._llm_prompt(step)
+            if prompt not in seen:
+                seen.add(prompt)
+                futures.append(pool.submit(self._do_call_llm, step, step.compiled or compile_step(step)))
+        return futures
+
+    def _run_steps_parallel(self, task: Task, pool: ThreadPoolExecutor) -> List[Any]:
+        steps = task.steps
+        pending = {idx: needs for idx, needs in enumerate(_step_dependencies(steps))}
+        results: List[Any] = [None] * len(steps)
+        running: Dict[Future, int] = {}
+
+        def _complete(idx: int, result: Any) -> None:
+            # variables are only written from the scheduling thread
+            results[idx] = result
+            assignment = steps[idx].assignment
+            if assignment:
+                self.vars[assignment] = result
+            for needs in pending.values():
+                needs.discard(idx)
+
+        while pending or running:
+            for idx in sorted(i for i, needs in pending.items() if not needs):
+                step = steps[idx]
+                del pending[idx]
+                self._check_step_requirements(task, step)
+                if (step.compiled or compile_step(step)).kind in _ORDERED_KINDS:
+                    _complete(idx, self.execute_step(step))
+                else:
+                    running[pool.submit(self.execute_step, step)] = idx
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                _complete(running.pop(future), future.result())
+        return results
+
+    def _enter_program(self, program: Program) -> None:
+        self._program = program
+        # build a quick lookup of declared capabilities per agent; repeat runs of the
+        # same program (e.g. a pooled runtime) reuse it while the agents metadata is
+        # the same object
+        agents_meta = program.meta.get("agents", {})
+        if agents_meta is not self._capabilities_source:
+            self._capabilities_source = agents_meta
+            self._agent_capabilities = {
+                agent_name: frozenset(info.get("capabilities", ())) for agent_name, info in agents_meta.items()
+            }
+
+    def _exit_program(self) -> None:
         # clear program context
         self._program = None
         self._current_task = None
         self._current_agent = None
-        return task_results
+
+    def _enter_task(self, task: Task) -> None:
+        # set current task/agent context for execute_step
+        self._current_task = task
+        agent, dot, _ = task.name.partition(".")
+        self._current_agent = agent if dot else None
+
+        if task.precondition and not self._eval_expr(task.precondition):
+            raise RuntimeError(f"Precondition failed for task {task.name}: {task.precondition}")
+
+    def _exit_task(self, task: Task, last_result: Any) -> None:
+        # if the task produced a result but did not assign it to a named variable,
+        # expose it under the task's def name (e.g., agent.fn -> 'fn') for convenience
+        if last_result is not None:
+            _, dot, def_name = task.name.partition(".")
+            if not dot:
+                def_name = task.name
+            if def_name not in self.vars:
+                self.vars[def_name] = last_result
+        if task.postcondition and not self._eval_expr(task.postcondition):
+            raise RuntimeError(f"Postcondition failed for task {task.name}: {task.postcondition}")
+
+    def _check_step_requirements(self, task: Task, step: Step) -> None:
+        # enforce declared capability requirements for each step
+        # NOTE: defer 'storage' checks to execute_step so the runtime can produce
+        # consistent, user-facing error messages and allow runtime-level overrides.
+        for req in step.requires:
+            if req == "storage":
+                # execute_step will validate storage capability and runtime.allow_storage
+                continue
+            if not self._has_capability(req):
+                raise RuntimeError(f"Missing required capability '{req}' for task '{task.name}' at step: {step.raw}")
 
     def _has_capability(self, capability: str) -> bool:
         """Return True if the current execution context allows a capability."""
         # runtime-level allow_storage overrides storage capability checks
-        if capability == "storage" and getattr(self, "allow_storage", False):
+        if capability == "storage" and self.allow_storage:
             return True
-        agent = getattr(self, "_current_agent", None)
-        if agent and hasattr(self, "_agent_capabilities"):
-            return capability in self._agent_capabilities.get(agent, [])
+        agent = self._current_agent
+        if agent:
+            return capability in self._agent_capabilities.get(agent, ())
         return False
 
-    def execute_step(self, step: Step) -> Any:
-        """Execute a single step and return its output."""
-        action = (step.action or "").lower()
-
-        if action == "fetch":
-            arg = step.args or ""
-            match = re.search(r'["\'](.*?)["\']', arg)
-            url = match.group(1) if match else arg
-            return f"fetched({url})"
-
-        if action == "call_llm":
-            args = step.args or ""
-            match = re.search(r'prompt\s*=\s*"(.*)"', args)
-            prompt = match.group(1) if match else args
-            prompt = re.sub(r'\{\{([A-Za-z0-9_]+)\}\}', lambda m: str(self.vars.get(m.group(1), "")), prompt)
-            return self.llm.call(prompt)
-
-        if action == "store":
-            # Centralized storage enforcement using ToolProxy when available.
-            kwargs = self._eval_kwargs(step.args or "")
-            # Check capability either via runtime override or agent declaration.
-            if not (self.allow_storage or self._has_capability("storage")):
-                raise RuntimeError("Storage capability not enabled for runtime or declared for the agent.")
-            # If a ToolProxy is provided, prefer it for side-effects and auditing.
-            if getattr(self, "tool_proxy", None) is not None:
-                proxy = self.tool_proxy
-                try:
-                    provided = proxy.capabilities()
-                except Exception:
-                    provided = []
-                if "storage" not in provided:
-                    raise RuntimeError("Bound ToolProxy does not declare 'storage' capability.")
-                context = {
-                    "task": getattr(getattr(self, "_current_task", None), "name", None),
-                    "agent": getattr(self, "_current_agent", None),
-                    "program_meta": getattr(getattr(self, "_program", None), "meta", {}),
-                }
-                result = proxy.perform("store", kwargs, context)
-                # Normalize StorageResult or similar structured result
-                if isinstance(result, StorageResult):
-                    return {"status": result.status, "key": result.key, "meta": result.meta}
-                return result
-            # Fallback deterministic behaviour for simple runtimes/tests
-            if not self.allow_storage:
-                raise RuntimeError("Storage capability not enabled for runtime.")
-            return {"status": "ok", "key": kwargs.get("key") or kwargs.get("path") or "item", "meta": {"mock": True, "size": len(str(kwargs.get("content") or kwargs.get("value") or ""))}}
-
-        if action == "assert":
-            expr = step.args or ""
-            if not self._eval_expr(expr):
-                raise RuntimeError(f"Assertion failed: {expr}")
-            return True
+    def _llm_prompt(self, step: Step) -> str:
+        plan = step.compiled or compile_step(step)
+        if not plan.template_vars:
+            return plan.template
+        return plan.template.format_map(_TemplateVars(self.vars))
 
-        if action.startswith("n8n."):
-            if self.n8n_client is None:
-                raise RuntimeError(f"n8n action '{action}' requested but runtime was not initialised with an N8NClient.")
-            kwargs = self._eval_kwargs(step.args or "")
-            sub_action = action.split(".", 1)[1]
-            if sub_action in {"trigger_webhook", "webhook"}:
-                path = kwargs.get("path")
-                if not path:
-                    raise RuntimeError("n8n webhook call requires a 'path' argument.")
-                payload = kwargs.get("payload") or kwargs.get("data") or {}
-                method = kwargs.get("method", "POST")
-                return self.n8n_client.trigger_webhook(path, payload=payload, method=method)
-            if sub_action in {"call_workflow", "workflow"}:
-                workflow_id = kwargs.get("workflow_id") or kwargs.get("id")
-                payload = kwargs.get("payload") or {}
-                return self.n8n_client.call_workflow(workflow_id, payload=payload)
-            raise RuntimeError(f"Unsupported n8n sub-action '{sub_action}'.")
-
-        if action.startswith("slack."):
-            raise RuntimeError(
-                "Slack actions are no longer bundled with the APL runtime. "
-                "Bind your agent to an MCP Slack server instead (see the MCP registry at https://modelcontextprotocol.io/registry or https://github.com/modelcontextprotocol/registry)."
-            )
+    async def execute_step_async(self, step: Step) -> Any:
+        """Execute a single step without blocking the event loop.
+
+        `call_llm` steps await the LLM's `acall` coroutine when it provides one;
+        every other action runs `execute_step` in a worker thread.
+        """
+        if (step.compiled or compile_step(step)).kind is ActionKind.CALL_LLM:
+            acall = getattr(self.llm, "acall", None)
+            if acall is not None:
+                prompt = self._llm_prompt(step)
+                key = ("call_llm", prompt)
+                cached = self._cache_get(key)
+                if cached is not _MISS:
+                    return cached
+                return self._cache_put(key, await acall(prompt))
+        import asyncio  # deferred: only the async entry points need the event loop machinery
+
+        return await asyncio.to_thread(self.execute_step, step)
+
+    def _cache_get(self, key: Tuple[str, str]) -> Any:
+        cache = self._action_cache
+        if cache is None:
+            return _MISS
+        with self._cache_lock:
+            if key not in cache:
+                return _MISS
+            cache.move_to_end(key)
+            return cache[key]
+
+    def _cache_put(self, key: Tuple[str, str], value: Any) -> Any:
+        cache = self._action_cache
+        if cache is not None:
+            with self._cache_lock:
+                cache[key] = value
+                if len(cache) > self._cache_size:
+                    cache.popitem(last=False)
+        return value
+
+    async def execute_steps_async(self, steps: List[Step], task: Optional[Task] = None) -> List[Any]:
+        """Execute steps concurrently along their dependency DAG and return their results.
+
+        Assignments are written to `self.vars`. When `task` is given, declared
+        capability requirements are enforced before each step is scheduled.
+        """
+        import asyncio
+
+        pending = {idx: needs for idx, needs in enumerate(_step_dependencies(steps))}
+        results: List[Any] = [None] * len(steps)
+        running: Dict["asyncio.Future[Any]", int] = {}
+
+        def _complete(idx: int, result: Any) -> None:
+            results[idx] = result
+            assignment = steps[idx].assignment
+            if assignment:
+                self.vars[assignment] = result
+            for needs in pending.values():
+                needs.discard(idx)
 
-        if action and "." in action:
+        try:
+            while pending or running:
+                for idx in sorted(i for i, needs in pending.items() if not needs):
+                    step = steps[idx]
+                    del pending[idx]
+                    if task is not None:
+                        self._check_step_requirements(task, step)
+                    if (step.compiled or compile_step(step)).kind in _ORDERED_KINDS:
+                        _complete(idx, await self.execute_step_async(step))
+                    else:
+                        running[asyncio.ensure_future(self.execute_step_async(step))] = idx
+                if not running:
+                    continue
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    _complete(running.pop(future), future.result())
+        finally:
+            for future in running:
+                future.cancel()
+        return results
+
+    async def execute_program_async(self, program: Program) -> Dict[str, Any]:
+        """Async counterpart of `execute_program_parallel` for use inside an event loop."""
+        self._enter_program(program)
+        task_results: Dict[str, Any] = {}
+        for task in program.tasks:
+            self._enter_task(task)
+            results = await self.execute_steps_async(task.steps, task=task)
+            self._exit_task(task, results[-1] if results else None)
+            task_results[task.name] = self.vars.copy()
+        self._exit_program()
+        return task_results
+
+    def execute_step(self, step: Step) -> Any:
+        """Execute a single step and return its output."""
+        plan = step.compiled or compile_step(step)
+        return self._handlers[plan.kind](self, step, plan)
+
+    def _do_fetch(self, step: Step, plan: CompiledStep) -> Any:
+        return f"fetched({plan.target})"
+
+    def _do_call_llm(self, step: Step, plan: CompiledStep) -> Any:
+        prompt = self._llm_prompt(step)
+        key = ("call_llm", prompt)
+        cached = self._cache_get(key)
+        if cached is not _MISS:
+            return cached
+        return self._cache_put(key, self.llm.call(prompt))
+
+    def _do_store(self, step: Step, plan: CompiledStep) -> Any:
+        # Centralized storage enforcement using ToolProxy when available.
+        kwargs = self._eval_kwargs(step.args or "")
+        # Check capability either via runtime override or agent declaration.
+        if not (self.allow_storage or self._has_capability("storage")):
+            raise RuntimeError("Storage capability not enabled for runtime or declared for the agent.")
+        # If a ToolProxy is provided, prefer it for side-effects and auditing.
+        proxy = self.tool_proxy
+        if proxy is not None:
+            try:
+                provided = proxy.capabilities()
+            except Exception:
+                provided = []
+            if "storage" not in provided:
+                raise RuntimeError("Bound ToolProxy does not declare 'storage' capability.")
+            task, program = self._current_task, self._program
+            context = {
+                "task": task.name if task is not None else None,
+                "agent": self._current_agent,
+                "program_meta": program.meta if program is not None else {},
+            }
+            result = proxy.perform("store", kwargs, context)
+            # Normalize StorageResult or similar structured result
+            if isinstance(result, StorageResult):
+                return {"status": result.status, "key": result.key, "meta": result.meta}
+            return result
+        # Fallback deterministic behaviour for simple runtimes/tests
+        if not self.allow_storage:
+            raise RuntimeError("Storage capability not enabled for runtime.")
+        return {"status": "ok", "key": kwargs.get("key") or kwargs.get("path") or "item", "meta": {"mock": True, "size": len(str(kwargs.get("content") or kwargs.get("value") or ""))}}
+
+    def _do_assert(self, step: Step, plan: CompiledStep) -> Any:
+        expr = step.args or ""
+        if not self._eval_expr(expr):
+            raise RuntimeError(f"Assertion failed: {expr}")
+        return True
+
+    def _do_n8n(self, step: Step, plan: CompiledStep) -> Any:
+        action = plan.action
+        if self.n8n_client is None:
+            raise RuntimeError(f"n8n action '{action}' requested but runtime was not initialised with an N8NClient.")
+        route = plan.target
+        if not route:
+            raise RuntimeError(f"Unsupported n8n sub-action '{action[4:]}'.")
+        kwargs = self._eval_kwargs(step.args or "")
+        if route == "trigger_webhook":
+            path = kwargs.get("path")
+            if not path:
+                raise RuntimeError("n8n webhook call requires a 'path' argument.")
+            payload = kwargs.get("payload") or kwargs.get("data") or {}
+            method = kwargs.get("method", "POST")
+            return self.n8n_client.trigger_webhook(path, payload=payload, method=method)
+        workflow_id = kwargs.get("workflow_id") or kwargs.get("id")
+        payload = kwargs.get("payload") or {}
+        return self.n8n_client.call_workflow(workflow_id or "", payload=payload)
+
+    def _do_slack(self, step: Step, plan: CompiledStep) -> Any:
+        raise RuntimeError(
+            "Slack actions are no longer bundled with the APL runtime. "
+            "Bind your agent to an MCP Slack server instead (see the MCP registry at https://modelcontextprotocol.io/registry or https://github.com/modelcontextprotocol/registry)."
+        )
+
+    def _do_custom(self, step: Step, plan: CompiledStep) -> Any:
+        """Handle other dotted tool actions; anything else echoes the raw line."""
+        action = plan.action
+        if "." in action:
             # Treat dotted calls (e.g., news.search) as JSON-friendly log output
-            return json.dumps({"tool": action, "args": step.args})
+            return dumps({"tool": action, "args": step.args}, indent=False).decode("utf-8")
 
         return step.raw
+
+
+class RuntimePool:
+    """Recycle Runtime instances so their setup and capability maps survive across runs.
+
+    `get` never blocks: when the pool is empty a fresh runtime is built from
+    `factory`. Runtimes are reset when returned and dropped once `size` are idle.
+    """
+
+    def __init__(self, factory: Callable[[], Runtime] = Runtime, size: int = 32) -> None:
+        self._factory = factory
+        self._size = size
+        self._idle: Deque[Runtime] = deque()
+
+    def get(self) -> Runtime:
+        try:
+            return self._idle.pop()
+        except IndexError:
+            return self._factory()
+
+    def put(self, runtime: Runtime) -> None:
+        runtime.reset()
+        if len(self._idle) < self._size:
+            self._idle.append(runtime)
+
+    @contextmanager
+    def lease(self) -> Iterator[Runtime]:
+        runtime = self.get()
+        try:
+            yield runtime
+        finally:
+            self.put(runtime)
@@ -93,3 +93,65 @@ def test_cmd_demo_pipeline(tmp_path: Path):
     ]
     for path in expected_files:
         assert path.exists(), f"Expected artifact not found: {path}"
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["validate", "prog.apl"],
+        ["run", "prog.apl", "--allow-storage"],
+        ["compile", "prog.apl", "--ir-out=ir.json", "--python-out", "mod.py", "--strict"],
+        ["repl"],
+        ["export-n8n", "prog.apl", "--runtime-url", "http://localhost:8000"],
+        ["author", "prompt.txt", "--out", "out.apl", "--mock"],
+        ["demo", "prompt.txt", "--name", "x", "--mock-llm"],
+    ],
+)
+def test_fast_parse_matches_argparse(argv):
+    fast = cli._fast_parse(argv)
+    assert fast is not None
+    assert vars(fast) == vars(cli.build_parser(argv).parse_args(argv))
+
+
+def test_fast_parse_defers_to_argparse():
+    assert cli._fast_parse([]) is None
+    assert cli._fast_parse(["run", "--help"]) is None
+    assert cli._fast_parse(["run"]) is None
+    assert cli._fast_parse(["author", "prompt.txt"]) is None
+
+
+def test_load_program_memoized_until_file_changes(tmp_path: Path):
+    path = tmp_path / "prog.apl"
+    path.write_text("agent a:\n  def t():\n    step x = fetch(url)\n  end\nend\n", encoding="utf-8")
+    first = cli._load_program(path)
+    assert cli._load_program(path) is first
+
+    path.write_text("agent a:\n  def t():\n    step y = fetch(url)\n  end\nend\n", encoding="utf-8")
+    second = cli._load_program(path)
+    assert second is not first
+    assert second.tasks[0].steps[0].assignment == "y"
+
+
+def test_repl_completer_matches_commands():
+    assert cli._repl_completer("r", 0) == "run"
+    assert cli._repl_completer("r", 1) is None
+    assert [cli._repl_completer("", i) for i in range(5)] == ["run", "help", "exit", "quit", None]
+
+
+def test_main_skips_env_loading_for_help_and_static_commands(monkeypatch, capsys, tmp_path: Path):
+    calls = []
+    monkeypatch.setattr(cli, "load_env_defaults", lambda: calls.append(1))
+
+    cli.main([])
+    with pytest.raises(SystemExit):
+        cli.main(["--help"])
+    program = tmp_path / "prog.apl"
+    program.write_text("agent a:\n  def t():\n    step x = fetch(url)\n  end\nend\n", encoding="utf-8")
+    cli.main(["validate", str(program)])
+    assert calls == []
+
+    cli.main(["run", str(program)])
+    assert calls == [1]
+
+    cli.main(["translate", str(program)])
+    assert calls == [1, 1]
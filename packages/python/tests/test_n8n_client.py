@@ -0,0 +1,137 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ClassVar, List
+
+import pytest
+
+from apl.n8n import N8NClient, N8NError
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # client ports of the requests served, reset by the n8n_server fixture
+    ports: ClassVar[List[int]] = []
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.ports.append(self.client_address[1])
+        if self.path.startswith("/webhook/drop"):
+            # read the request, then hang up without answering
+            self.close_connection = True
+            return
+        if self.path.startswith("/webhook/moved"):
+            out = b"<html>moved</html>" if "html" in self.path else b""
+            self.send_response(307 if out else 302)
+            self.send_header("Location", "/webhook/ticket")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+            return
+        if self.path.startswith("/webhook/missing"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        out = json.dumps(
+            {"path": self.path, "echo": body, "key": self.headers.get("X-N8N-API-KEY")}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+        if self.path.startswith("/webhook/once"):
+            # keep-alive response, but the server closes the idle connection anyway
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def n8n_server(monkeypatch):
+    for var in ("http_proxy", "HTTP_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(var, raising=False)
+    _Handler.ports = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_reuses_keepalive_connection(n8n_server):
+    client = N8NClient(n8n_server, api_key="secret")
+    first = client.trigger_webhook("/ticket", payload={"n": 1})
+    second = client.call_workflow("wf1", payload={"n": 2})
+    client.close()
+
+    assert first == {"path": "/webhook/ticket", "echo": {"n": 1}, "key": "secret"}
+    assert second["path"] == "/workflow/run/wf1"
+    # both requests were served over the same client socket
+    assert len(set(_Handler.ports)) == 1
+
+
+def test_client_raises_on_http_error(n8n_server):
+    client = N8NClient(n8n_server)
+    with pytest.raises(N8NError, match="404"):
+        client.trigger_webhook("/missing")
+
+
+@pytest.mark.parametrize("path", ["/moved", "/moved-html"])
+def test_client_raises_on_redirect(n8n_server, path):
+    client = N8NClient(n8n_server)
+    with pytest.raises(N8NError, match="30[27]"):
+        client.trigger_webhook(path, payload={})
+
+
+def test_api_key_is_read_per_request(n8n_server):
+    client = N8NClient(n8n_server)
+    assert client.trigger_webhook("/ticket", payload={})["key"] is None
+    client.api_key = "rotated"
+    assert client.trigger_webhook("/ticket", payload={})["key"] == "rotated"
+
+
+def test_warm_connection_serves_first_request(n8n_server):
+    client = N8NClient(n8n_server)
+    client.warm()
+    assert len(client._idle) == 1
+    client.trigger_webhook("/ticket", payload={})
+    assert len(client._idle) == 1
+    client.close()
+    assert len(set(_Handler.ports)) == 1
+
+
+def test_context_manager_closes_pool(n8n_server):
+    with N8NClient(n8n_server) as client:
+        client.trigger_webhook("/ticket", payload={})
+        assert len(client._idle) == 1
+    assert client._idle == []
+
+
+def test_post_is_not_resent_when_reused_connection_drops_before_response(n8n_server):
+    client = N8NClient(n8n_server)
+    client.trigger_webhook("/ticket", payload={})
+    with pytest.raises(N8NError):
+        client.trigger_webhook("/drop", payload={"n": 1})
+    client.close()
+    # one request for /ticket and exactly one delivery of the dropped POST
+    assert len(_Handler.ports) == 2
+
+
+def test_idle_connection_closed_by_server_is_replaced(n8n_server):
+    import time
+    from apl.n8n import _connection_dropped
+
+    client = N8NClient(n8n_server)
+    client.trigger_webhook("/once", payload={})
+    # wait until the server's close has reached the pooled socket
+    deadline = time.monotonic() + 5
+    while not _connection_dropped(client._idle[0]) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.trigger_webhook("/ticket", payload={"n": 2})["echo"] == {"n": 2}
+    client.close()
+    assert len(_Handler.ports) == 2 and len(set(_Handler.ports)) == 2
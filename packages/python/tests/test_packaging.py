@@ -0,0 +1,23 @@
+import ast
+from pathlib import Path
+
+from setuptools import find_namespace_packages
+
+ROOT = Path(__file__).parents[3]
+
+
+def _setup_packages():
+    tree = ast.parse((ROOT / "setup.py").read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "setup":
+            for kw in node.keywords:
+                if kw.arg == "packages":
+                    return ast.literal_eval(kw.value)
+    raise AssertionError("setup() call with packages=... not found")
+
+
+def test_setup_lists_every_package():
+    found = find_namespace_packages(
+        where=str(ROOT / "packages" / "python" / "src"), include=["apl", "apl.*"]
+    )
+    assert sorted(_setup_packages()) == sorted(found)
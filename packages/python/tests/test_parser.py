@@ -1,14 +1,6 @@
 import json
-from pathlib import Path
 
-# Ensure tests import the local package when run from repo root
-import sys
-ROOT = Path(__file__).resolve().parents[3]
-SRC = ROOT / "packages" / "python" / "src"
-if str(SRC) not in sys.path:
-    sys.path.insert(0, str(SRC))
-
-from apl.parser import parse_apl  # noqa: E402
+from apl.parser import parse_apl
 
 SAMPLE_PROGRAM = """
 program demo(version="0.1")
@@ -78,3 +70,27 @@ end
     assert any(s.action == "call_llm" for s in task.steps)
     prompts = [s.args for s in task.steps if s.action == "call_llm"]
     assert any("Hello, how are you?" in p for p in prompts)
+
+def test_load_or_parse_reuses_cache_until_source_changes(tmp_path, monkeypatch):
+    from apl.parser import load_or_parse
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    src = tmp_path / "demo.apl"
+    src.write_text(SAMPLE_PROGRAM, encoding="utf-8")
+    first = load_or_parse(src)
+    # nothing is written beside the source; the cache is owner-only
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cache", "demo.apl"]
+    (cached,) = (tmp_path / "cache" / "apl" / "ast").iterdir()
+    assert cached.stat().st_mode & 0o077 == 0
+    assert load_or_parse(src) == first
+
+    src.write_text(SAMPLE_PROGRAM.replace("demo", "renamed", 1), encoding="utf-8")
+    assert load_or_parse(src).name == "renamed"
+
+
+def test_parse_apl_file_streams_same_program(tmp_path):
+    from apl.parser import parse_apl_file
+
+    src = tmp_path / "prog.apl"
+    src.write_text(SAMPLE_PROGRAM, encoding="utf-8")
+    assert parse_apl_file(src) == parse_apl(SAMPLE_PROGRAM)
@@ -1,17 +1,10 @@
 import json
-from pathlib import Path
-import sys
+import os
 
 import pytest
 
-# Ensure tests import the local package when run from repo root
-ROOT = Path(__file__).resolve().parents[3]
-SRC = ROOT / "packages" / "python" / "src"
-if str(SRC) not in sys.path:
-    sys.path.insert(0, str(SRC))
-
-from apl.parser import parse_apl  # noqa: E402
-from apl.runtime import Runtime  # noqa: E402
+from apl.parser import parse_apl
+from apl.runtime import Runtime
 
 def test_storage_capability_enforced():
     sample = '''
@@ -29,8 +22,8 @@ end
 
     runtime_ok = Runtime(allow_storage=True)
     result = runtime_ok.execute_program(prog)
-    # stored result should appear (runtime returns "stored" for store)
-    assert any("s" in vars_snapshot for vars_snapshot in result.values())
+    # the unassigned store result is exposed under the def name
+    assert result["a.s"]["s"]["status"] == "ok"
 
 def test_precondition_blocks_execution():
     sample = '''
@@ -47,6 +40,16 @@ end
         runtime.execute_program(prog)
     assert "Precondition failed" in str(exc.value)
 
+class _MockN8NClient:
+    """Minimal stand-in exposing the N8NClient methods the runtime calls."""
+
+    def trigger_webhook(self, path, payload=None, method="POST"):
+        return {"ok": True, "path": path, "method": method}
+
+    def call_workflow(self, workflow_id, payload=None):
+        return {"ok": True, "workflow_id": workflow_id}
+
+
 def test_n8n_requires_client_and_calls_trigger():
     sample = '''
 agent a:
@@ -62,20 +65,10 @@ end
         runtime.execute_program(prog)
     assert "n8n action" in str(exc.value)
 
-    # provide a minimal mock client with the expected method
-    class MockClient:
-        def trigger_webhook(self, path, payload=None, method="POST"):
-            return {"ok": True, "path": path, "method": method}
-
-        def call_workflow(self, workflow_id, payload=None):
-            return {"ok": True, "workflow_id": workflow_id}
-
-    runtime_with_client = Runtime(n8n_client=MockClient())
+    runtime_with_client = Runtime(n8n_client=_MockN8NClient())
     res = runtime_with_client.execute_program(prog)
-    # Should not raise and should include results
-    assert isinstance(res, dict)
-    # the n8n call result may be present in vars snapshot
-    assert any(isinstance(v, dict) or (isinstance(v, str) and "ok" in v) for v in next(iter(res.values())).values())
+    # the unassigned webhook result is exposed under the def name
+    assert res["a.t"]["t"] == {"ok": True, "path": "/apl/test", "method": "POST"}
 
 def test_slack_actions_raise_informative_error():
     sample = '''
@@ -90,3 +83,417 @@ end
     with pytest.raises(RuntimeError) as exc:
         runtime.execute_program(prog)
     assert "Slack actions are no longer bundled" in str(exc.value)
+
+def test_runtime_subclass_can_override_action_handlers():
+    class SlackRuntime(Runtime):
+        def _do_slack(self, step, plan):
+            return "posted"
+
+    prog = parse_apl('''
+agent a:
+  def t():
+    step sent = slack.post_message(channel="#ops", text="hi")
+  end
+end
+''')
+    assert SlackRuntime().execute_program(prog)["a.t"]["sent"] == "posted"
+
+def test_execute_program_parallel_matches_sequential():
+    sample = '''
+agent a:
+  def t(ticket):
+    step summary = call_llm(prompt="Summarize {{ticket}}")
+    step reply = call_llm(prompt="Reply to {{ticket}}")
+    step combined = call_llm(prompt="{{summary}} / {{reply}}")
+  end
+end
+'''
+    prog = parse_apl(sample)
+    sequential = Runtime()
+    sequential.vars["ticket"] = "printer on fire"
+    parallel = Runtime()
+    parallel.vars["ticket"] = "printer on fire"
+    assert parallel.execute_program_parallel(prog) == sequential.execute_program(prog)
+
+
+def test_execute_program_parallel_overlaps_llm_calls_across_tasks():
+    import threading
+
+    class BarrierLLM:
+        # the two fixed prompts only get through the barrier if they are in flight together
+        def __init__(self):
+            self.barrier = threading.Barrier(2, timeout=5)
+            self.prompts = []
+
+        def call(self, prompt, model="mock"):
+            self.prompts.append(prompt)
+            if prompt.startswith("fixed"):
+                self.barrier.wait()
+            return prompt.upper()
+
+    prog = parse_apl('''
+agent a:
+  def first():
+    step x = call_llm(prompt="fixed one")
+  end
+end
+agent b:
+  def second():
+    step y = call_llm(prompt="fixed two")
+    step z = call_llm(prompt="after {{x}}")
+  end
+end
+''')
+    llm = BarrierLLM()
+    result = Runtime(llm=llm).execute_program_parallel(prog)
+    assert result["b.second"]["z"] == "AFTER FIXED ONE"
+    assert sorted(llm.prompts) == ["after FIXED ONE", "fixed one", "fixed two"]
+
+
+def test_execute_program_parallel_raises_without_waiting_for_prefetched_calls():
+    import threading
+
+    release = threading.Event()
+
+    class SlowLLM:
+        def __init__(self):
+            self.prompts = []
+            self.finished = []
+
+        def call(self, prompt, model="mock"):
+            self.prompts.append(prompt)
+            release.wait(timeout=5)
+            self.finished.append(prompt)
+            return prompt
+
+    prog = parse_apl('''
+agent a:
+  def first():
+    step assert(1 == 2)
+  end
+end
+agent b:
+  def second():
+    step y = call_llm(prompt="two")
+  end
+end
+agent c:
+  def third():
+    step z = call_llm(prompt="three")
+  end
+end
+''')
+    llm = SlowLLM()
+    try:
+        with pytest.raises(RuntimeError, match="Assertion failed"):
+            Runtime(llm=llm).execute_program_parallel(prog)
+        # only the next task is prefetched, and the error does not wait for it
+        assert llm.finished == []
+        assert "three" not in llm.prompts
+    finally:
+        release.set()
+
+
+def test_execute_program_can_skip_per_task_snapshots():
+    prog = parse_apl('''
+agent a:
+  def first():
+    step x = call_llm(prompt="one")
+  end
+end
+agent b:
+  def second():
+    step y = call_llm(prompt="two {{x}}")
+  end
+end
+''')
+    full = Runtime().execute_program(prog)
+    last_only = Runtime().execute_program(prog, collect_per_task=False)
+    assert list(last_only) == ["b.second"]
+    assert last_only["b.second"] == full["b.second"]
+
+
+def test_step_dependencies_follow_assignments_and_barriers():
+    from apl.runtime import _step_dependencies
+
+    sample = '''
+agent a:
+  def t():
+    step x = call_llm(prompt="one")
+    step y = call_llm(prompt="two")
+    step z = call_llm(prompt="{{x}}")
+    step assert(y != "")
+    step w = call_llm(prompt="three")
+  end
+end
+'''
+    steps = parse_apl(sample).tasks[0].steps
+    assert _step_dependencies(steps) == [set(), set(), {0}, {0, 1, 2}, {3}]
+
+
+def test_execute_program_async_matches_sequential():
+    import asyncio
+
+    sample = '''
+agent a:
+  def t(ticket):
+    step summary = call_llm(prompt="Summarize {{ticket}}")
+    step reply = call_llm(prompt="Reply to {{ticket}}")
+    step assert(summary != reply)
+  end
+end
+'''
+    prog = parse_apl(sample)
+    sequential = Runtime()
+    sequential.vars["ticket"] = "printer on fire"
+    concurrent = Runtime()
+    concurrent.vars["ticket"] = "printer on fire"
+    expected = sequential.execute_program(prog)
+    assert asyncio.run(concurrent.execute_program_async(prog)) == expected
+
+
+def test_eval_expr_caches_compiled_code():
+    from apl.runtime import _compile_expr
+
+    runtime = Runtime()
+    runtime.vars["n"] = 3
+    assert runtime._eval_expr("n + 1 == 4")
+    assert _compile_expr("n + 1 == 4") is _compile_expr("n + 1 == 4")
+    with pytest.raises(RuntimeError):
+        runtime._eval_expr("n.real")
+
+
+def test_compiled_step_renders_templates():
+    from apl.runtime import ActionKind, compile_step
+
+    prog = parse_apl('''
+agent a:
+  def t():
+    step reply = call_llm(prompt="Hi {{name}}, ticket {{ticket}} done {json} {{missing}}")
+    step hits = news.search(query)
+    step n8n.webhook(path="/x")
+  end
+end
+''')
+    step = prog.tasks[0].steps[0]
+    plan = compile_step(step)
+    assert plan.kind is ActionKind.CALL_LLM
+    assert plan.template_vars == ("name", "ticket", "missing")
+    assert compile_step(prog.tasks[0].steps[1]).kind is ActionKind.CUSTOM
+    n8n_plan = compile_step(prog.tasks[0].steps[2])
+    assert n8n_plan.kind is ActionKind.N8N and n8n_plan.target == "trigger_webhook"
+    runtime = Runtime()
+    runtime.vars.update(name="Ada", ticket=7)
+    assert runtime.execute_step(step) == "[mocked:mock] Hi Ada, ticket 7 done {json}"
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_custom_action_log_is_identical_across_json_backends(monkeypatch, use_orjson):
+    from apl import _json
+
+    if use_orjson and _json.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(_json, "orjson", None)
+    prog = parse_apl('''
+agent a:
+  def t():
+    step hits = news.search(query="café")
+  end
+end
+''')
+    hits = Runtime().execute_program(prog)["a.t"]["hits"]
+    assert hits == '{"tool":"news.search","args":"query=\\"café\\""}'
+
+
+def test_batching_llm_coalesces_parallel_prompts():
+    import asyncio
+    from apl.llm_batch import BatchingLLM
+
+    batches = []
+
+    def fake_batch(prompts, model):
+        batches.append(list(prompts))
+        return [f"{model}:{p}" for p in prompts]
+
+    prog = parse_apl('''
+agent a:
+  def t():
+    step x = call_llm(prompt="one")
+    step y = call_llm(prompt="two")
+  end
+end
+''')
+    runtime = Runtime(llm=BatchingLLM(model="m", batch_fn=fake_batch))
+    result = asyncio.run(runtime.execute_program_async(prog))
+    assert batches == [["one", "two"]]
+    assert result["a.t"]["x"] == "m:one" and result["a.t"]["y"] == "m:two"
+
+
+def test_batching_llm_groups_prompts_by_model():
+    import asyncio
+    from apl.llm_batch import BatchingLLM
+
+    batches = []
+
+    def fake_batch(prompts, model):
+        batches.append((model, list(prompts)))
+        return [f"{model}:{p}" for p in prompts]
+
+    llm = BatchingLLM(model="m", batch_fn=fake_batch)
+
+    async def run():
+        return await asyncio.gather(llm.acall("one"), llm.acall("two", model="big"), llm.acall("three"))
+
+    assert asyncio.run(run()) == ["m:one", "big:two", "m:three"]
+    assert sorted(batches) == [("big", ["two"]), ("m", ["one", "three"])]
+    assert not llm._tasks
+
+
+def test_batching_llm_flushes_again_on_a_new_event_loop():
+    import asyncio
+    from apl.llm_batch import BatchingLLM
+
+    llm = BatchingLLM(model="m", batch_fn=lambda prompts, model: list(prompts), max_batch=2)
+
+    async def full_batch():
+        return await asyncio.gather(llm.acall("a"), llm.acall("b"))
+
+    assert asyncio.run(full_batch()) == ["a", "b"]
+    # the size-triggered flush must not leave a timer tied to the finished loop
+    assert asyncio.run(asyncio.wait_for(llm.acall("c"), timeout=5)) == "c"
+
+
+def test_runtime_memoizes_repeated_llm_prompts():
+    class CountingLLM:
+        def __init__(self):
+            self.calls = 0
+
+        def call(self, prompt, model="mock"):
+            self.calls += 1
+            return prompt
+
+    prog = parse_apl('''
+agent a:
+  def t():
+    step x = call_llm(prompt="same")
+    step y = call_llm(prompt="same")
+  end
+end
+''')
+    llm = CountingLLM()
+    Runtime(llm=llm).execute_program(prog)
+    assert llm.calls == 1
+
+    uncached = CountingLLM()
+    Runtime(llm=uncached, cache=False).execute_program(prog)
+    assert uncached.calls == 2
+
+    # memoized replies are scoped to a run: reset (e.g. via RuntimePool) drops them
+    runtime = Runtime(llm=CountingLLM())
+    runtime.execute_program(prog)
+    runtime.reset()
+    runtime.execute_program(prog)
+    assert runtime.llm.calls == 2
+
+
+def test_eval_expr_closure_evaluator_matches_python_semantics():
+    runtime = Runtime()
+    runtime.vars.update(items=[1, 2, 3], name="ada", empty="")
+    assert runtime._eval_expr("len(items) > 2 and name") == "ada"
+    assert runtime._eval_expr("empty or items[-1]") == 3
+    assert runtime._eval_expr('{"n": name, "tail": items[1:]}') == {"n": "ada", "tail": [2, 3]}
+    # starred displays are outside the closure subset and use the eval fallback
+    assert runtime._eval_expr("[*items, 4]") == [1, 2, 3, 4]
+
+
+def test_runtime_pool_recycles_reset_runtimes():
+    from apl.runtime import RuntimePool
+
+    pool = RuntimePool(size=1)
+    with pool.lease() as runtime:
+        runtime.vars["ticket"] = "x"
+        held = runtime.vars
+    assert held == {"ticket": "x"}
+    reused = pool.get()
+    assert reused is runtime and reused.vars == {}
+    assert pool.get() is not runtime
+
+
+def test_agent_capabilities_built_once_per_program():
+    prog = parse_apl('''
+agent a:
+  capability web
+  def t():
+    step hits = news.search(query) requires capability.web
+  end
+end
+''')
+    runtime = Runtime()
+    runtime.execute_program(prog)
+    caps = runtime._agent_capabilities
+    assert caps == {"a": frozenset({"web"})}
+    runtime.reset()
+    runtime.execute_program(prog)
+    assert runtime._agent_capabilities is caps
+    runtime.execute_program(parse_apl("agent b:\nend\n"))
+    assert runtime._agent_capabilities == {"b": frozenset()}
+
+
+def test_runtime_snapshot_restore():
+    runtime = Runtime()
+    runtime.vars["seed"] = 1
+    state = runtime.snapshot()
+    runtime.vars["seed"] = 2
+    runtime.vars["extra"] = True
+    runtime.restore(state)
+    assert runtime.vars == {"seed": 1}
+    assert state == {"seed": 1}
+
+
+def test_eval_kwargs_resolves_env_values(monkeypatch):
+    monkeypatch.setenv("APL_TEST_TOKEN", "tok")
+    runtime = Runtime()
+    runtime.vars["n"] = 2
+    assert runtime._eval_kwargs('token="env:APL_TEST_TOKEN", count=n + 1') == {"token": "tok", "count": 3}
+    assert runtime._eval_kwargs('key="x"') == {"key": "x"}
+    # literal env references are read at call time, computed values still resolve
+    monkeypatch.setenv("APL_TEST_TOKEN", "rotated")
+    assert runtime._eval_kwargs('token="env:APL_TEST_TOKEN", items=[1]') == {"token": "rotated", "items": [1]}
+    runtime.vars["ref"] = "env:APL_TEST_TOKEN"
+    assert runtime._eval_kwargs("token=ref") == {"token": "rotated"}
+
+
+def test_eval_kwargs_reuses_parsed_plan_with_current_vars():
+    from apl.runtime import _compile_kwargs
+
+    runtime = Runtime()
+    runtime.vars["n"] = 1
+    assert runtime._eval_kwargs("count=n * 10, items=[n, 'x']") == {"count": 10, "items": [1, "x"]}
+    runtime.vars["n"] = 2
+    hits = _compile_kwargs.cache_info().hits
+    assert runtime._eval_kwargs("count=n * 10, items=[n, 'x']") == {"count": 20, "items": [2, "x"]}
+    assert _compile_kwargs.cache_info().hits == hits + 1
+    with pytest.raises(RuntimeError, match="Attribute access"):
+        runtime._eval_kwargs("x=n.real")
+
+
+def test_load_env_defaults_runs_once_until_reset(tmp_path, monkeypatch):
+    from apl import env
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("APL_NO_ENV_CACHE", "1")
+    monkeypatch.delenv("APL_TEST_ONCE", raising=False)
+    monkeypatch.setattr(env, "_ENV_LOADED", False)
+    (tmp_path / ".env").write_text("APL_TEST_ONCE=first\n", encoding="utf-8")
+    Runtime()
+    assert os.environ["APL_TEST_ONCE"] == "first"
+
+    monkeypatch.delenv("APL_TEST_ONCE")
+    Runtime()
+    assert "APL_TEST_ONCE" not in os.environ
+
+    env.reset_env_defaults()
+    Runtime()
+    assert os.environ["APL_TEST_ONCE"] == "first"
+    monkeypatch.delenv("APL_TEST_ONCE")
@@ -4,24 +4,22 @@ from apl.runtime import Runtime
 from apl.ast import Program, Task, Step
 from apl.integrations.toolproxy import MockStorageProxy
 
-def test_store_with_tool_proxy():
-    program = Program(
+
+def _store_program(task_name, args, meta=None, assignment="out"):
+    """A one-step program whose task stores `args` and requires the storage capability."""
+    return Program(
         name="p",
-        meta={
-            "agents": {
-                "agent1": {"capabilities": ["storage"]}
-            }
-        },
+        meta=meta or {},
         tasks=[
             Task(
-                name="agent1.save",
+                name=task_name,
                 args=[],
                 steps=[
                     Step(
-                        raw='store key="file1", content="hello"',
-                        assignment="out",
+                        raw=f"store {args}",
+                        assignment=assignment,
                         action="store",
-                        args='key="file1", content="hello"',
+                        args=args,
                         requires=["storage"],
                     )
                 ],
@@ -29,6 +27,14 @@ def test_store_with_tool_proxy():
         ],
     )
 
+
+def test_store_with_tool_proxy():
+    program = _store_program(
+        "agent1.save",
+        'key="file1", content="hello"',
+        meta={"agents": {"agent1": {"capabilities": ["storage"]}}},
+    )
+
     runtime = Runtime(tool_proxy=MockStorageProxy())
     results = runtime.execute_program(program)
 
@@ -38,25 +44,7 @@ def test_store_with_tool_proxy():
     assert "requesting_task" in results["agent1.save"]["out"]["meta"]
 
 def test_store_with_allow_storage_fallback():
-    program = Program(
-        name="p",
-        meta={},
-        tasks=[
-            Task(
-                name="anon.save",
-                args=[],
-                steps=[
-                    Step(
-                        raw='store key="x", content="y"',
-                        assignment="out",
-                        action="store",
-                        args='key="x", content="y"',
-                        requires=["storage"],
-                    )
-                ],
-            )
-        ],
-    )
+    program = _store_program("anon.save", 'key="x", content="y"')
 
     runtime = Runtime(allow_storage=True)
     results = runtime.execute_program(program)
@@ -65,25 +53,7 @@ def test_store_with_allow_storage_fallback():
     assert results["anon.save"]["out"]["meta"].get("mock") is True
 
 def test_missing_storage_raises():
-    program = Program(
-        name="p",
-        meta={},
-        tasks=[
-            Task(
-                name="agent.save",
-                args=[],
-                steps=[
-                    Step(
-                        raw='store key="x"',
-                        assignment=None,
-                        action="store",
-                        args='key="x"',
-                        requires=["storage"],
-                    )
-                ],
-            )
-        ],
-    )
+    program = _store_program("agent.save", 'key="x"', assignment=None)
 
     runtime = Runtime()
     with pytest.raises(RuntimeError):
@@ -2,13 +2,34 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
-from setuptools import find_packages, setup
+from setuptools import setup
 
 ROOT = Path(__file__).parent
 README = ROOT / "docs" / "README.md"
 
+# Opt-in native build of the runtime hot path: `APL_USE_MYPYC=1 pip install .`
+# compiles the step dispatcher with mypyc. Without the flag (or without mypy
+# installed) the package stays pure Python.
+ext_modules = []
+if os.environ.get("APL_USE_MYPYC", "").lower() in {"1", "true", "yes"}:
+    try:
+        from mypyc.build import mypycify
+    except ImportError:  # pragma: no cover - build-time optional dependency
+        print(
+            "APL_USE_MYPYC is set but mypy is not installed; building pure-Python package."
+        )
+    else:
+        ext_modules = mypycify(
+            [
+                "--ignore-missing-imports",
+                "--follow-imports=silent",
+                "packages/python/src/apl/runtime.py",
+            ]
+        )
+
 setup(
     name="apl",
     version="0.1.0",
@@ -18,8 +39,11 @@ setup(
     author="Agent Programming Language maintainers",
     python_requires=">=3.10",
     package_dir={"": "packages/python/src"},
-    packages=find_packages(where="packages/python/src"),
+    # listed explicitly (kept in sync by tests/test_packaging.py) so builds never
+    # depend on a directory walk that silently skips packages
+    packages=["apl", "apl.integrations"],
     include_package_data=True,
+    ext_modules=ext_modules,
     install_requires=[
         # Add core runtime dependencies here when they become non-stdlib.
     ],
@@ -29,6 +53,7 @@ setup(
             "pytest>=7.0.0",
             "black>=23.0.0",
             "ruff>=0.1.0",
+            "mypy>=1.5.0",
         ],
     },
     entry_points={"console_scripts": ["apl=apl.cli:main"]},